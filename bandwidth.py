@@ -0,0 +1,56 @@
+import threading
+import time
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by concurrent downloads, limiting their combined rate.
+
+    ``consume`` lets the balance go negative and then sleeps the caller until the debt is repaid, so a chunk larger
+    than the burst size is still accepted and concurrent callers queue up behind each other's debt.
+    """
+
+    def __init__(self, rate_bytes_per_second: float, burst_bytes: float):
+
+        self.rate        = rate_bytes_per_second
+        self.capacity    = burst_bytes
+        self.tokens      = burst_bytes
+        self.updated_at  = time.monotonic()
+        self.lock        = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+
+        with self.lock:
+
+            now              = time.monotonic()
+            self.tokens      = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at  = now
+            self.tokens     -= amount
+
+            wait_seconds = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if wait_seconds:
+            time.sleep(wait_seconds)
+
+_download_limiter       = None
+_download_limiter_lock  = threading.Lock()
+
+def download_limiter() -> TokenBucket | None:
+    """
+    Returns the token bucket shared by every download in the process, or ``None`` if downloads are unthrottled.
+    """
+
+    global _download_limiter
+
+    if not settings.download_bandwidth_limit_bytes_per_second:
+        return None
+
+    with _download_limiter_lock:
+
+        if _download_limiter is None:
+            _download_limiter = TokenBucket(settings.download_bandwidth_limit_bytes_per_second, settings.download_bandwidth_burst_bytes)
+
+    return _download_limiter
@@ -0,0 +1,101 @@
+"""
+Benchmarks incremental extraction on a near-identical re-release.
+
+Builds two archives of the same package tree that differ in one modified, one added and one removed file,
+installs the first, then applies the second with a full and with an incremental extraction and reports the
+files and bytes written and the time taken by each.
+
+Usage:
+    python benchmarks/bench_incremental_extract.py [--files 3000] [--file-size 8192]
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import extract_zip_flat
+
+def build_release(zip_path: str, tag: str, files: dict[str, bytes]) -> None:
+
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+
+        for relative_path, content in files.items():
+            zip_ref.writestr(f"repo-{tag}/{relative_path}", content)
+
+def run(label: str, zip_path: str, installed_dir: str, work_dir: str, incremental: bool) -> dict:
+
+    target_dir = os.path.join(work_dir, label)
+
+    shutil.copytree(installed_dir, target_dir)
+
+    stats   = {}
+    started = time.perf_counter()
+
+    extract_zip_flat(zip_path, target_dir, incremental=incremental, stats=stats)
+
+    stats["seconds"] = time.perf_counter() - started
+
+    print(f"{label:<12} written={stats['written']:<6} skipped={stats['skipped']:<6} removed={stats['removed']:<3} bytes_written={stats['bytes_written']:<10} time={stats['seconds'] * 1000:.0f}ms")
+
+    return stats
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--file-size", type=int, default=8192)
+    args = parser.parse_args()
+
+    # Keep the extraction summary out of log.log
+    logging.disable(logging.INFO)
+
+    rng = random.Random(1234)
+
+    release_v1 = {f"pkg{i % 50}/module_{i}.py": rng.randbytes(args.file_size) for i in range(args.files)}
+    release_v2 = dict(release_v1)
+
+    release_v2["pkg0/module_0.py"] = rng.randbytes(args.file_size)
+    release_v2["pkg0/new_module.py"] = rng.randbytes(args.file_size)
+    del release_v2["pkg1/module_1.py"]
+
+    work_dir = tempfile.mkdtemp(prefix="bench_extract_")
+
+    try:
+        v1_zip        = os.path.join(work_dir, "v1.zip")
+        v2_zip        = os.path.join(work_dir, "v2.zip")
+        installed_dir = os.path.join(work_dir, "installed")
+
+        build_release(v1_zip, "v1", release_v1)
+        build_release(v2_zip, "v2", release_v2)
+
+        # The installed tree carries the index an incremental install of v1 would have left behind
+        extract_zip_flat(v1_zip, installed_dir, incremental=True)
+
+        full        = run("full", v2_zip, installed_dir, work_dir, incremental=False)
+        incremental = run("incremental", v2_zip, installed_dir, work_dir, incremental=True)
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    saved = 1 - incremental["bytes_written"] / full["bytes_written"]
+
+    print(f"I/O saved: {saved:.1%} of bytes written, {full['seconds'] / incremental['seconds']:.1f}x faster")
+
+    if incremental["written"] != 2 or incremental["removed"] != 1:
+
+        print("FAIL: expected exactly one modified file, one added file and one removed file.")
+
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Benchmarks the request policy against a local server that injects latency spikes and transient errors.
+
+Runs the same sequence of metadata requests twice, once with a bare ``urlopen`` and once through
+``request_policy.fetch`` with retries and hedging, and reports success rate and tail latency for both.
+
+Usage:
+    python benchmarks/bench_request_policy.py [--requests 400] [--spike-rate 0.03] [--error-rate 0.05]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request, error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import settings
+import request_policy
+
+class FaultInjectingHandler(BaseHTTPRequestHandler):
+
+    base_latency    = 0.01
+    spike_latency   = 1.0
+    spike_rate      = 0.03
+    error_rate      = 0.05
+    rng             = random.Random(1234)
+    rng_lock        = threading.Lock()
+
+    def do_GET(self):
+
+        with self.rng_lock:
+            roll_error = self.rng.random()
+            roll_spike = self.rng.random()
+
+        if roll_error < self.error_rate:
+
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+            return
+
+        time.sleep(self.spike_latency if roll_spike < self.spike_rate else self.base_latency)
+
+        body = b'{"tag_name": "v1.0.0"}'
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def percentile(samples: list[float], fraction: float) -> float:
+
+    ordered = sorted(samples)
+
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run(label: str, url: str, count: int, send) -> dict:
+
+    latencies = []
+    failures  = 0
+
+    for _ in range(count):
+
+        started = time.perf_counter()
+
+        try:
+            send(request.Request(url, method="GET"))
+
+        except (error.URLError, TimeoutError):
+
+            failures += 1
+
+            continue
+
+        latencies.append(time.perf_counter() - started)
+
+    result = {
+
+        "label"     : label,
+        "success"   : (count - failures) / count,
+        "p50"       : percentile(latencies, 0.50),
+        "p95"       : percentile(latencies, 0.95),
+        "p99"       : percentile(latencies, 0.99),
+        "max"       : max(latencies),
+
+    }
+
+    print(f"{label:<10} success={result['success']:.1%}  p50={result['p50'] * 1000:.0f}ms  p95={result['p95'] * 1000:.0f}ms  p99={result['p99'] * 1000:.0f}ms  max={result['max'] * 1000:.0f}ms")
+
+    return result
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--spike-rate", type=float, default=0.03)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    FaultInjectingHandler.spike_rate = args.spike_rate
+    FaultInjectingHandler.error_rate = args.error_rate
+
+    # Retry warnings are expected here and would drown out the results
+    logging.disable(logging.WARNING)
+
+    # Keep backoff short so the benchmark measures the policy rather than the sleep schedule
+    settings.request_backoff_base_seconds = 0.01
+    settings.request_backoff_max_seconds  = 0.1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FaultInjectingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/repos/owner/repo/releases/latest"
+
+    try:
+        baseline = run("baseline", url, args.requests, lambda req: request.urlopen(req, timeout=5).read())
+
+        request_policy.start_run_deadline(300)
+
+        policy = run("policy", url, args.requests, lambda req: request_policy.fetch(req, timeout=5, hedge=True))
+
+    finally:
+        server.shutdown()
+
+    print(f"policy counters: {request_policy.request_metrics}")
+
+    if policy["success"] < 1.0:
+
+        print("FAIL: the request policy let transient errors through.")
+
+        return 1
+
+    if policy["p99"] >= baseline["p99"]:
+
+        print("FAIL: hedging did not reduce p99 latency.")
+
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Benchmarks the updater's cold start on the warm no-op path.
+
+Measures the cumulative import time of ``main`` with ``python -X importtime`` (best of several runs, after a
+warm-up run so the bytecode cache is populated). The budget is relative to the same interpreter's import of
+``urllib.request``, which every run needs anyway: importing main fails the check if it takes more than
+``settings.startup_import_budget_ratio`` times that floor, so the check means the same on a fast and a slow host.
+An absolute budget can be given with ``--budget-ms`` or the ``STARTUP_IMPORT_BUDGET_MS`` environment variable.
+It then runs one update pass against a mocked GitHub that reports the installed release, and fails if the pass
+imported any of the modules that should only load when an update or provisioning is needed.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 7] [--budget-ms 150]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, REPO_ROOT)
+
+import settings
+
+# Modules that a run finding nothing to update must not import. shutil and hashlib are left out because
+# urllib.request, which every run needs, imports them itself.
+DEFERRED_MODULES = [
+
+    "zipfile",
+    "getpass",
+    "subprocess",
+    "compileall",
+    "http.server",
+    "concurrent.futures",
+    "create_env_bundle",
+    "install_new_dependencies",
+    "package_management",
+    "precompile",
+    "extract_index",
+    "staging",
+    "webhook_listener",
+    "release_plan",
+    "package_lock",
+
+]
+
+def import_time_ms(module: str = "main") -> float:
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    for line in result.stderr.splitlines():
+
+        match = re.match(rf"import time:\s+\d+ \|\s+(\d+) \| {re.escape(module)}$", line)
+
+        if match:
+            return int(match.group(1)) / 1000
+
+    raise RuntimeError(f"{module} was not found in the -X importtime output.")
+
+# Runs in a fresh interpreter that imports nothing but main and what main needs, so the modules it reports
+# were loaded by the updater itself. The installed release equals the latest one, so the pass is a no-op.
+NO_OP_CHILD = """
+import json, os, sys
+
+sys.path.insert(0, sys.argv[1])
+
+import main
+import release_metadata
+from state_store import open_state_store
+
+root_directory = sys.argv[2]
+
+os.makedirs(os.path.join(root_directory, "package"))
+
+with open_state_store(root_directory) as store:
+    store.record_install("package", "repo", "v1.0.0", None, 0.0)
+
+release_metadata.fetch_with_headers = lambda req, **kwargs: (b'{"tag_name": "v1.0.0", "assets": []}', {})
+
+main.run_updates(root_directory, {"package": "repo"}, "owner", "token")
+
+print(json.dumps([name for name in json.loads(sys.argv[3]) if name in sys.modules]))
+"""
+
+def main() -> int:
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=os.environ.get("STARTUP_IMPORT_BUDGET_MS"), help="Absolute budget for importing main, instead of the ratio to the urllib.request floor.")
+    args = parser.parse_args()
+
+    # Warm-up run writes __pycache__ so the measured runs reflect a scheduled run on an installed host
+    import_time_ms()
+
+    samples = [import_time_ms() for _ in range(args.runs)]
+    best    = min(samples)
+    floor   = min(import_time_ms("urllib.request") for _ in range(args.runs))
+
+    if args.budget_ms is not None:
+        budget = float(args.budget_ms)
+    else:
+        budget = floor * settings.startup_import_budget_ratio
+
+    print(f"import main: best={best:.1f}ms median={sorted(samples)[len(samples) // 2]:.1f}ms budget={budget:.1f}ms (urllib.request floor={floor:.1f}ms)")
+
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as work_dir:
+
+        child = subprocess.run(
+            [sys.executable, "-c", NO_OP_CHILD, REPO_ROOT, os.path.join(work_dir, "base"), json.dumps(DEFERRED_MODULES)],
+            cwd=work_dir,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+
+    loaded = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"deferred modules imported by a no-op run: {', '.join(loaded) or 'none'}")
+
+    if best > budget:
+
+        print("FAIL: importing main exceeds the start-up budget.")
+
+        return 1
+
+    if loaded:
+
+        print("FAIL: the no-op path imported modules that should be deferred.")
+
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from error_handler import global_error_handler
+from extract_index import remove_stale_files
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+def objects_directory(root_directory: str) -> str:
+
+    return os.path.join(root_directory, settings.content_store_directory_name)
+
+def version_directory(root_directory: str, package: str, tag: str) -> str:
+
+    return os.path.join(root_directory, settings.versions_directory_name, package, tag)
+
+def object_path(objects_dir: str, digest: str) -> str:
+
+    return os.path.join(objects_dir, digest[:2], digest[2:])
+
+def store_object(objects_dir: str, source) -> tuple[str, int]:
+    """
+    Streams a file body into the store, keyed by its sha256. A body already in the store is not written again.
+    Args:
+        objects_dir (str): The store directory.
+        source: A binary file object to read the body from.
+    Returns:
+        tuple[str, int]: The body's sha256 hex digest and size.
+    """
+
+    first_chunk = source.read(CHUNK_SIZE)
+
+    # Most files fit in one chunk: hash them in memory so a body the store already holds costs no write at all
+    if len(first_chunk) < CHUNK_SIZE:
+
+        digest      = hashlib.sha256(first_chunk).hexdigest()
+        stored_path = object_path(objects_dir, digest)
+
+        if not os.path.exists(stored_path):
+
+            os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(stored_path), prefix=".incoming-")
+
+            with os.fdopen(fd, "wb") as f:
+                f.write(first_chunk)
+
+            os.replace(temp_path, stored_path)
+
+        return digest, len(first_chunk)
+
+    os.makedirs(objects_dir, exist_ok=True)
+
+    digest          = hashlib.sha256(first_chunk)
+    size            = len(first_chunk)
+    fd, temp_path   = tempfile.mkstemp(dir=objects_dir, prefix=".incoming-")
+
+    try:
+
+        with os.fdopen(fd, "wb") as f:
+
+            f.write(first_chunk)
+
+            while chunk := source.read(CHUNK_SIZE):
+
+                digest.update(chunk)
+                f.write(chunk)
+
+                size += len(chunk)
+
+        stored_path = object_path(objects_dir, digest.hexdigest())
+
+        if os.path.exists(stored_path):
+
+            os.remove(temp_path)
+
+        else:
+
+            os.makedirs(os.path.dirname(stored_path), exist_ok=True)
+            os.replace(temp_path, stored_path)
+
+    except BaseException:
+
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        raise
+
+    return digest.hexdigest(), size
+
+def link_object(objects_dir: str, digest: str, target_path: str) -> None:
+    """
+    Points target_path at a stored body with a hardlink, replacing whatever was there atomically.
+    Falls back to a copy on filesystems without hardlink support.
+    """
+
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+    temp_path = target_path + ".link-tmp"
+
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    try:
+        os.link(object_path(objects_dir, digest), temp_path)
+
+    except OSError:
+        shutil.copy2(object_path(objects_dir, digest), temp_path)
+
+    os.replace(temp_path, target_path)
+
+def load_version_manifest(version_dir: str) -> dict | None:
+    """
+    Returns the manifest of a materialised version: ``files`` (``{relative path: sha256}``) and ``commit_sha``.
+    Returns ``None`` if the version was never (completely) materialised; the manifest is written last,
+    so its presence marks a complete tree.
+    """
+
+    try:
+        with open(version_dir + ".json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    except (OSError, ValueError):
+        return None
+
+def save_version_manifest(version_dir: str, files: dict[str, str], commit_sha: str | None = None) -> None:
+
+    temp_path = version_dir + ".json.tmp"
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"files": files, "commit_sha": commit_sha}, f)
+
+    os.replace(temp_path, version_dir + ".json")
+
+def switch_tree(objects_dir: str, target_dir: str, manifest: dict[str, str], previous_manifest: dict[str, str]) -> dict[str, int]:
+    """
+    Makes target_dir hold the version described by manifest, touching only files whose content changed.
+    Files whose digest matches the previous manifest are left alone without being opened or stat'ed,
+    changed files are re-linked, and files dropped from the version are removed.
+    Returns counts of ``linked``, ``unchanged`` and ``removed`` files.
+    """
+
+    counters = {"linked": 0, "unchanged": 0, "removed": 0}
+
+    for relative_path, digest in manifest.items():
+
+        target_path = os.path.join(target_dir, relative_path)
+
+        if previous_manifest.get(relative_path) == digest:
+
+            counters["unchanged"] += 1
+
+            continue
+
+        # Without a previous manifest (first switch) the file may already be a link to the right body
+        if relative_path not in previous_manifest and os.path.exists(target_path) and os.path.samefile(target_path, object_path(objects_dir, digest)):
+
+            counters["unchanged"] += 1
+
+            continue
+
+        link_object(objects_dir, digest, target_path)
+
+        counters["linked"] += 1
+
+    counters["removed"] = remove_stale_files(target_dir, previous_manifest, set(manifest))
+
+    return counters
+
+def prune_versions(root_directory: str, package: str, keep: int, protected_tags: set[str]) -> None:
+    """
+    Removes all but the ``keep`` most recently materialised versions of a package, never removing protected tags.
+    Store objects they leave unreferenced are reclaimed by ``collect_garbage``.
+    """
+
+    package_versions = os.path.join(root_directory, settings.versions_directory_name, package)
+
+    if not os.path.isdir(package_versions):
+        return
+
+    manifests = sorted(
+
+        (entry for entry in os.listdir(package_versions) if entry.endswith(".json")),
+        key=lambda entry: os.path.getmtime(os.path.join(package_versions, entry)),
+        reverse=True
+
+    )
+
+    for manifest_name in manifests[keep:]:
+
+        tag = manifest_name[:-len(".json")]
+
+        if tag in protected_tags:
+            continue
+
+        os.remove(os.path.join(package_versions, manifest_name))
+        shutil.rmtree(os.path.join(package_versions, tag), ignore_errors=True)
+
+def referenced_objects(root_directory: str) -> set[str]:
+    """
+    Returns the digest of every body a kept version manifest refers to. The installed version of each package
+    is always among the kept versions, as ``prune_versions`` never removes the tag being switched to.
+    """
+
+    versions_root = os.path.join(root_directory, settings.versions_directory_name)
+    referenced    = set()
+
+    if not os.path.isdir(versions_root):
+        return referenced
+
+    for package in os.listdir(versions_root):
+
+        package_versions = os.path.join(versions_root, package)
+
+        if not os.path.isdir(package_versions):
+            continue
+
+        for entry in os.listdir(package_versions):
+
+            if not entry.endswith(".json"):
+                continue
+
+            version = load_version_manifest(os.path.join(package_versions, entry[:-len(".json")]))
+
+            if version is None:
+                raise ValueError(f"The version manifest {os.path.join(package_versions, entry)} could not be read.")
+
+            referenced.update(version["files"].values())
+
+    return referenced
+
+def collect_garbage(root_directory: str) -> int:
+    """
+    Removes stored bodies that no kept version manifest refers to.
+    Link counts alone can't tell this, since ``link_object`` falls back to copies where hardlinks aren't supported,
+    leaving every object with a single link. A body that still has other links is kept as well: it belongs to a
+    version whose manifest isn't written yet.
+    Must not run while a release is being extracted into the store, as freshly stored bodies are not referenced yet.
+    Returns the number of objects removed.
+    """
+
+    objects_dir     = objects_directory(root_directory)
+    removed_objects = 0
+
+    if not os.path.isdir(objects_dir):
+        return 0
+
+    # Raises rather than deleting everything if a manifest can't be read
+    referenced = referenced_objects(root_directory)
+
+    for current_directory, _, file_names in os.walk(objects_dir):
+
+        for file_name in file_names:
+
+            if file_name.startswith(".incoming-"):
+                continue
+
+            file_path = os.path.join(current_directory, file_name)
+            digest    = os.path.basename(current_directory) + file_name
+
+            if digest in referenced or os.stat(file_path).st_nlink > 1:
+                continue
+
+            os.remove(file_path)
+
+            removed_objects += 1
+
+    if removed_objects:
+        global_error_handler("Content Store", f"Removed {removed_objects} unreferenced objects from {objects_dir}.", logging_level=logging.INFO)
+
+    return removed_objects
@@ -1,15 +1,12 @@
 import os
-import subprocess
 from dotenv_constants import dotenv_constants
 from error_handler import global_error_handler
 import logging
 import settings
+from package_management import run_command
 
 logger = logging.getLogger(__name__)
 
-def run_command(cmd: str, cwd:str) -> None:
-    return subprocess.run(cmd, cwd=cwd, text=True, capture_output=True)
-
 def create_bat_file(cwd: str) -> str | None:
     """
     Creates a 'run.bat' file in the specified current working directory (cwd).
@@ -181,8 +178,8 @@ def create_venv(cwd:str) -> str | None:
     Notes:
         - If a virtual environment already exists and is not empty, returns the existing venv path.
         - Creates a .venv directory in the specified working directory.
-        - Uses subprocess to execute 'python -m venv .venv' command.
-        - On failure, logs error message with stderr and return code.
+        - Uses `package_management.run_command` to execute 'python -m venv .venv' command.
+        - On failure, logs error message with the command's trailing output and return code.
     """
             
     global_error_handler("Creating Virtual Environment", "First, we're creating the Virtual Environment...")
@@ -197,13 +194,16 @@ def create_venv(cwd:str) -> str | None:
 
     create_venv = run_command(["python","-m", "venv", ".venv"], cwd)
 
-    if create_venv.returncode != 0:
+    if create_venv is None or create_venv.returncode != 0:
         
-        global_error_handler("Creating Virtual Environment", f"Failed to create virtual environment in {cwd}. Error: {create_venv.stderr} {create_venv.returncode}")
+        error_output = create_venv.stdout if create_venv else "command could not be started"
+        return_code  = create_venv.returncode if create_venv else None
+
+        global_error_handler("Creating Virtual Environment", f"Failed to create virtual environment in {cwd}. Error: {error_output} {return_code}")
         
         return None
                             
-    return create_venv.stdout
+    return venv_path
     
 def create_env_files(cwd:str, root_directory:str, personal_access_token:str, organization_owner:str, mql5_root_directory:str) -> bool:
     
@@ -0,0 +1,111 @@
+import os
+import json
+import zlib
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+CRC_CHUNK_SIZE = 1024 * 1024
+
+def load_extract_index(target_dir: str) -> dict[str, dict]:
+    """
+    Loads the stat/CRC index of the files a previous extraction wrote into target_dir.
+    Entries are keyed by relative path and hold ``size``, ``mtime_ns`` and ``crc``.
+    A missing or unreadable index is treated as empty.
+    """
+
+    index_path = os.path.join(target_dir, settings.extract_index_filename)
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    except (OSError, ValueError):
+        return {}
+
+def save_extract_index(target_dir: str, index: dict[str, dict]) -> None:
+
+    index_path = os.path.join(target_dir, settings.extract_index_filename)
+    temp_path  = index_path + ".tmp"
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+    os.replace(temp_path, index_path)
+
+def file_crc32(file_path: str) -> int:
+
+    crc = 0
+
+    with open(file_path, "rb") as f:
+
+        while chunk := f.read(CRC_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+
+    return crc
+
+def index_entry(file_path: str, crc: int) -> dict:
+
+    stat = os.stat(file_path)
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "crc": crc}
+
+def matches_member(file_path: str, member_size: int, member_crc: int, cached_entry: dict | None) -> tuple[bool, dict | None]:
+    """
+    Decides whether the file on disk already holds the archive member's content.
+    The cached index entry is trusted while the file's size and mtime are unchanged, so unchanged files are not re-read;
+    otherwise the file's CRC32 is computed and compared.
+    Returns whether the file matches, and its fresh index entry if it does.
+    """
+
+    try:
+        stat = os.stat(file_path)
+
+    except FileNotFoundError:
+        return False, None
+
+    if stat.st_size != member_size:
+        return False, None
+
+    if cached_entry and cached_entry["size"] == stat.st_size and cached_entry["mtime_ns"] == stat.st_mtime_ns:
+
+        if cached_entry["crc"] == member_crc:
+            return True, cached_entry
+
+        return False, None
+
+    if file_crc32(file_path) != member_crc:
+        return False, None
+
+    return True, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "crc": member_crc}
+
+def remove_stale_files(target_dir: str, previous_index: dict[str, dict], current_paths: set[str]) -> int:
+    """
+    Removes files a previous extraction wrote that are no longer part of the release, pruning directories left empty.
+    Files the updater never extracted (``.venv``, ``.env``, ``run.bat``, ...) are not in the index and are never touched.
+    Returns the number of files removed.
+    """
+
+    removed_files = 0
+
+    for relative_path in previous_index.keys() - current_paths:
+
+        file_path = os.path.join(target_dir, relative_path)
+
+        if not os.path.isfile(file_path):
+            continue
+
+        os.remove(file_path)
+
+        removed_files += 1
+
+        parent_directory = os.path.dirname(file_path)
+
+        while os.path.normpath(parent_directory) != os.path.normpath(target_dir) and not os.listdir(parent_directory):
+
+            os.rmdir(parent_directory)
+
+            parent_directory = os.path.dirname(parent_directory)
+
+    return removed_files
@@ -1,28 +1,235 @@
 import hashlib
 import subprocess
 import os
+import json
+import tempfile
 from error_handler import global_error_handler
 import logging
 import settings
+from package_management import run_command
 
 logger = logging.getLogger(__name__) 
 
+def run_checked(command: list[str]) -> None:
+    """
+    Runs a command through ``package_management.run_command`` and raises ``subprocess.CalledProcessError``
+    if it could not be started, timed out or exited non-zero. The error's ``output`` holds the command's trailing output.
+    """
+
+    result = run_command(command)
+
+    if result is None:
+        raise subprocess.CalledProcessError(-1, command, output="command could not be started")
+
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, command, output=result.stdout)
+
+LOCK_FINGERPRINT_PREFIX = "# fingerprint: sha256:"
+
+# Printed by the venv's interpreter: the wheels pip pins depend on the Python version, ABI and platform
+INTERPRETER_TAG_SCRIPT = "import sys, sysconfig; print(f'{sys.implementation.cache_tag}-{sysconfig.get_platform()}')"
+
+def interpreter_tag(python_executable: str) -> str:
+    """
+    Returns the interpreter and platform tag of the virtual environment's Python (e.g. ``cpython-311-win-amd64``).
+    Raises:
+        subprocess.CalledProcessError: If the interpreter could not be run.
+    """
+
+    result = run_command([python_executable, "-c", INTERPRETER_TAG_SCRIPT])
+
+    if result is None or result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode if result else -1, python_executable, output=result.stdout if result else "command could not be started")
+
+    return result.stdout.strip().splitlines()[-1]
+
+def requirements_fingerprint(requirements_path: str, python_tag: str) -> str:
+    """
+    Returns the sha256 hex digest of the requirements file and the venv's interpreter tag, used to decide whether
+    the lock file is stale. The tag is included because the pinned wheel hashes are specific to the Python version
+    and platform, so a venv rebuilt on another Python needs a new lock even if the requirements are unchanged.
+    """
+
+    digest = hashlib.sha256()
+
+    with open(requirements_path, "rb") as f:
+        digest.update(f.read())
+
+    digest.update(b"\0" + python_tag.encode("utf-8"))
+
+    return digest.hexdigest()
+
+def read_lock_fingerprint(lock_path: str) -> str | None:
+    """
+    Reads the requirements fingerprint recorded in the header of an existing lock file.
+    Returns ``None`` if the lock file is missing or has no fingerprint header.
+    """
+
+    if not os.path.exists(lock_path):
+        return None
+
+    with open(lock_path, "r") as f:
+        first_line = f.readline().strip()
+
+    if not first_line.startswith(LOCK_FINGERPRINT_PREFIX):
+        return None
+
+    return first_line[len(LOCK_FINGERPRINT_PREFIX):]
+
+def _archive_sha256(download_info: dict) -> str | None:
+
+    archive_info = download_info.get("archive_info", {})
+
+    sha256 = archive_info.get("hashes", {}).get("sha256")
+
+    if sha256:
+        return sha256
+
+    # Older pip reports only carry the legacy "<algorithm>=<digest>" field
+    legacy_hash = archive_info.get("hash", "")
+
+    if legacy_hash.startswith("sha256="):
+        return legacy_hash[len("sha256="):]
+
+    return None
+
+def generate_lock_file(python_executable: str, requirements_path: str, lock_path: str, fingerprint: str) -> bool:
+    """
+    Resolves the requirements file once and writes a fully pinned lock file (``name==version --hash=sha256:...``).
+    Resolution is done with ``pip install --dry-run --report`` so nothing is installed while the lock is built.
+    Args:
+        python_executable (str): The virtual environment's Python executable.
+        requirements_path (str): Path to the unpinned requirements file.
+        lock_path (str): Path the lock file is written to.
+        fingerprint (str): The requirements fingerprint recorded in the lock header.
+    Returns:
+        bool: ``True`` if the lock file was written; otherwise ``False``.
+    """
+
+    global_error_handler(
+        "Dependency Lock",
+        f"Resolving {requirements_path} into {lock_path}...",
+        logging_level=logging.INFO
+    )
+
+    report_fd, report_path = tempfile.mkstemp(suffix=".json")
+    os.close(report_fd)
+
+    try:
+        run_checked(
+            [python_executable, "-m", "pip", "install", "--dry-run", "--ignore-installed", "--quiet", "--report", report_path, "-r", requirements_path]
+        )
+
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+
+        pinned_lines = []
+
+        for item in report.get("install", []):
+
+            name    = item["metadata"]["name"]
+            version = item["metadata"]["version"]
+            sha256  = _archive_sha256(item.get("download_info", {}))
+
+            if not sha256:
+                raise ValueError(f"No sha256 hash reported for {name}=={version}; cannot build a hash-checked lock.")
+
+            pinned_lines.append(f"{name}=={version} --hash=sha256:{sha256}")
+
+        # Write to a temporary file first so an interrupted run never leaves a half-written lock behind
+        temp_lock_path = lock_path + ".tmp"
+
+        with open(temp_lock_path, "w") as f:
+
+            f.write(f"{LOCK_FINGERPRINT_PREFIX}{fingerprint}\n")
+            f.write("# Generated by the updater, do not edit. Delete this file to force re-resolution.\n")
+
+            for line in sorted(pinned_lines, key=str.lower):
+                f.write(line + "\n")
+
+        os.replace(temp_lock_path, lock_path)
+
+        global_error_handler(
+            "Dependency Lock",
+            f"Lock file written with {len(pinned_lines)} pinned packages.",
+            logging_level=logging.INFO
+        )
+
+        return True
+
+    except subprocess.CalledProcessError as e:
+        global_error_handler(
+            "Dependency Lock Failure",
+            f"Failed to resolve dependencies: {e.output}",
+            logging_level=logging.ERROR
+        )
+        return False
+
+    except Exception as e:
+        global_error_handler(
+            "Dependency Lock Failure",
+            f"{type(e).__name__}: {e}",
+            logging_level=logging.ERROR
+        )
+        return False
+
+    finally:
+        if os.path.exists(report_path):
+            os.remove(report_path)
+
+def ensure_lock_file(python_executable: str, requirements_path: str, lock_filename: str = settings.requirements_lock_filename) -> str | None:
+    """
+    Returns the path to an up-to-date lock file stored next to the requirements file.
+    The lock is regenerated only when the fingerprint of the requirements and the venv's interpreter differs from
+    the one recorded in the lock header.
+    Returns ``None`` if the lock could not be generated.
+    """
+
+    lock_path = os.path.join(os.path.dirname(requirements_path), lock_filename)
+
+    try:
+        fingerprint = requirements_fingerprint(requirements_path, interpreter_tag(python_executable))
+
+    except subprocess.CalledProcessError as e:
+
+        global_error_handler("Dependency Lock Failure", f"Could not determine the virtual environment's Python version: {e.output}", logging_level=logging.ERROR)
+
+        return None
+
+    if read_lock_fingerprint(lock_path) == fingerprint:
+
+        global_error_handler(
+            "Dependency Lock",
+            "Requirements unchanged, reusing existing lock file.",
+            logging_level=logging.INFO
+        )
+
+        return lock_path
+
+    if not generate_lock_file(python_executable, requirements_path, lock_path, fingerprint):
+        return None
+
+    return lock_path
+
 def update_requirements(cwd: str, dependancy_filename: str = settings.requirements_txt_filename) -> bool:
     """
-    Install and upgrade project dependencies from a requirements file using a local virtual environment.
+    Install project dependencies from a requirements file using a local virtual environment.
     This function expects a virtual environment at ``<cwd>/.venv`` (Windows layout) and:
     - upgrades ``pip`` using the venv's Python executable, then
-    - installs/upgrades packages listed in the dependency file (default: ``requirements.txt``).
+    - resolves the dependency file (default: ``requirements.txt``) into a pinned, hashed lock file
+      (default: ``requirements.lock``) if the dependency file changed since the lock was written, then
+    - installs the lock with ``--no-deps --require-hashes`` so no resolution happens at install time.
     The dependency file is used as input only and is never modified.
     Args:
         cwd (str): Project root directory containing the ``.venv`` folder and dependency file.
         dependancy_filename (str, optional): Name of the dependency file located in ``cwd``.
             Defaults to ``settings.requirements_txt_filename``.
     Returns:
-        bool: ``True`` if pip upgrade and dependency installation both complete successfully;
+        bool: ``True`` if pip upgrade, locking and dependency installation all complete successfully;
         otherwise ``False``.
     Side Effects:
-        - Executes external subprocess commands for pip operations.
+        - Executes pip commands through ``package_management.run_command``, which streams their output into the log.
+        - Writes the lock file next to the dependency file when it is missing or stale.
         - Emits status and error messages through ``global_error_handler``.
     Notes:
         - Requires Windows-style virtual environment paths:
@@ -45,11 +252,8 @@ def update_requirements(cwd: str, dependancy_filename: str = settings.requiremen
 
     try:
         # Upgrade pip
-        subprocess.run(
-            [python_executable, "-m", "pip", "install", "--upgrade", "pip"],
-            check=True,
-            capture_output=True,
-            text=True
+        run_checked(
+            [python_executable, "-m", "pip", "install", "--upgrade", "pip"]
         )
 
         global_error_handler(
@@ -66,6 +270,11 @@ def update_requirements(cwd: str, dependancy_filename: str = settings.requiremen
         )
         return False
 
+    lock_path = ensure_lock_file(python_executable, requirements_path)
+
+    if not lock_path:
+        return False
+
     try:
         global_error_handler(
             "Dependency Update",
@@ -73,10 +282,9 @@ def update_requirements(cwd: str, dependancy_filename: str = settings.requiremen
             logging_level=logging.INFO
         )
 
-        # Install / upgrade dependencies from file
-        subprocess.run(
-            [pip_executable, "install", "--upgrade", "-r", requirements_path],
-            check=True
+        # Install the pinned set from the lock file; resolution already happened when the lock was written
+        run_checked(
+            [pip_executable, "install", "--no-deps", "--require-hashes", "-r", lock_path]
         )
 
         global_error_handler(
@@ -90,7 +298,7 @@ def update_requirements(cwd: str, dependancy_filename: str = settings.requiremen
     except subprocess.CalledProcessError as e:
         global_error_handler(
             "Dependency Installation Failure",
-            f"Failed to install dependencies: {e}",
+            f"Failed to install dependencies: {e}\n{e.output}",
             logging_level=logging.ERROR
         )
         return False
@@ -1,16 +1,49 @@
 import os
 from error_handler import global_error_handler
-import zipfile
-from install_new_dependencies import update_requirements
-from create_env_bundle import create_env_files
-import getpass
+from request_policy import open_url, fetch, start_run_deadline, report_request_metrics
+from release_metadata import fetch_latest_release, fetch_expected_sha256, release_archive_url, estimate_archive_size
 from urllib import request, error
 import json
+import time
 import logging
+import settings
+from state_store import StateStore, open_state_store
+from repository_manifest import load_repository_manifest
+
+# Only what a run that finds nothing to update needs is imported here. Archive handling, provisioning,
+# dependency installation, precompilation, staging, the webhook listener and the planner are imported
+# inside the functions that use them, so a scheduled no-op run doesn't pay for them at start-up.
 
 logger = logging.getLogger(__name__)
 
-def extract_zip_flat(zip_path:str, target_dir:str):
+def extract_zip_flat(zip_path:str, target_dir:str, incremental:bool = False, stats:dict | None = None, objects_dir:str | None = None, crcs:dict | None = None) -> dict[str, int]:
+    """
+    Extracts a GitHub archive into target_dir, dropping the archive's top-level directory.
+    Args:
+        zip_path (str): The downloaded archive.
+        target_dir (str): The directory to extract into.
+        incremental (bool): Only write members whose size or CRC32 differ from the file already on disk,
+            and remove files a previous extraction wrote that are no longer in the archive. Unchanged files keep
+            their mtime, so their ``__pycache__`` entries stay valid.
+        stats (dict | None): If given, filled with ``written``, ``skipped``, ``removed`` and ``bytes_written``.
+        objects_dir (str | None): Write each file body into this content-addressed store (once per unique body)
+            and hardlink it into target_dir. The version manifest (``{path: sha256}`` and the commit SHA) is saved
+            next to target_dir once every member is in place. Not combined with ``incremental``.
+        crcs (dict | None): If given, filled with the archive's CRC32 of every file, keyed like the return value.
+    Returns:
+        dict[str, int]: The size of every file in the archive, keyed by its path relative to target_dir.
+    """
+
+    import shutil
+    import zipfile
+    from extract_index import load_extract_index, save_extract_index, matches_member, index_entry, remove_stale_files
+    from content_store import store_object, link_object, save_version_manifest
+
+    extracted_sizes = {}
+    previous_index  = load_extract_index(target_dir) if incremental else {}
+    current_index   = {}
+    manifest        = {}
+    counters        = {"written": 0, "skipped": 0, "removed": 0, "bytes_written": 0}
     
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
         
@@ -29,42 +62,90 @@ def extract_zip_flat(zip_path:str, target_dir:str):
                 
                 continue
             
+            member_info = zip_ref.getinfo(member)
             member_path = member[len(common_prefix):]
             target_path = os.path.join(target_dir, member_path)
+
+            extracted_sizes[member_path] = member_info.file_size
+
+            if crcs is not None:
+                crcs[member_path] = member_info.CRC
+
+            if incremental:
+
+                unchanged, cached_entry = matches_member(target_path, member_info.file_size, member_info.CRC, previous_index.get(member_path))
+
+                if unchanged:
+
+                    current_index[member_path] = cached_entry
+                    counters["skipped"]       += 1
+
+                    continue
+
+            if objects_dir:
+
+                with zip_ref.open(member) as source:
+                    
+                    manifest[member_path], _ = store_object(objects_dir, source)
+
+                link_object(objects_dir, manifest[member_path], target_path)
+
+                counters["written"] += 1
+
+                continue
+
             os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+            # Write beside the file and swap it in: the old file may be a hardlink into the content store, which
+            # writing in place would corrupt, and a crash never leaves a half-written module behind
+            temp_path = target_path + ".extract-tmp"
             
-            with zip_ref.open(member) as source, open(target_path, "wb") as target:
+            with zip_ref.open(member) as source, open(temp_path, "wb") as target:
                 
-                target.write(source.read())
+                shutil.copyfileobj(source, target)
 
-def get_latest_tag(repo_name:str, organization_name:str, organization_token:str) -> dict:
-    
-    global_error_handler("Fetching latest tag", f"Attempting to fetch the latest tag for {repo_name} from GitHub....", logging_level=logging.INFO)
+            os.replace(temp_path, target_path)
 
-    try:
+            counters["written"]       += 1
+            counters["bytes_written"] += member_info.file_size
 
-        url = f"https://api.github.com/repos/{organization_name}/{repo_name}/releases/latest"
-    
-        headers = {
+            if incremental:
+                current_index[member_path] = index_entry(target_path, member_info.CRC)
 
-            "User-Agent"    : "Updater/1.0",
-            "Authorization" : f"token {organization_token}",
+    if objects_dir:
+        save_version_manifest(target_dir, manifest, archive_commit_sha(zip_path))
 
-        }
+    if incremental:
 
-        req = request.Request(url, headers=headers, method="GET")
+        counters["removed"] = remove_stale_files(target_dir, previous_index, set(extracted_sizes))
 
-        with request.urlopen(req) as response:
-            body                     = response.read().decode("utf-8")
-            get_latest_release_tag   = json.loads(body)
+        save_extract_index(target_dir, current_index)
 
-            latest_release_tag = get_latest_release_tag.get("tag_name") 
-        
-            if not latest_release_tag:
-                
-                raise ValueError(f"No tags found for {repo_name}, please ensure that you have created a tag for the latest release.")
+        global_error_handler("Incremental extraction", f"{counters['written']} files written ({counters['bytes_written']} bytes), {counters['skipped']} unchanged, {counters['removed']} removed in {target_dir}.", logging_level=logging.INFO)
+
+    if stats is not None:
+        stats.update(counters)
+
+    return extracted_sizes
+
+def get_latest_release(repo_name:str, organization_name:str, organization_token:str) -> dict | None:
+    """
+    Returns the latest release of a repository (tag name, assets, ...), or ``None`` if it could not be retrieved.
+    """
+    
+    global_error_handler("Fetching latest tag", f"Attempting to fetch the latest tag for {repo_name} from GitHub....", logging_level=logging.INFO)
+
+    try:
+
+        latest_release, _ = fetch_latest_release(repo_name, organization_name, organization_token)
+
+        latest_release_tag = latest_release.get("tag_name") 
+    
+        if not latest_release_tag:
             
-            return latest_release_tag 
+            raise ValueError(f"No tags found for {repo_name}, please ensure that you have created a tag for the latest release.")
+        
+        return latest_release 
     
     except error.HTTPError as e:
         
@@ -78,123 +159,328 @@ def get_latest_tag(repo_name:str, organization_name:str, organization_token:str)
         
         return None
 
-def install_updates(repo_name:str, target_dir:str, organization_owner:str, organization_token:str) -> bool:
+def get_latest_tag(repo_name:str, organization_name:str, organization_token:str) -> str | None:
+
+    latest_release = get_latest_release(repo_name, organization_name, organization_token)
+
+    return latest_release["tag_name"] if latest_release else None
+
+def archive_commit_sha(zip_path:str) -> str | None:
     """
-    Downloads and extracts the GitHub repo as a ZIP into the target_dir (flattened).
-    
+    Returns the commit SHA GitHub stores as the comment of tag archives, or ``None`` if the archive has none.
     """
 
-    release_tag = get_latest_tag(repo_name, organization_owner, organization_token)
-    zip_url     = f"https://github.com/{organization_owner}/{repo_name}/archive/refs/tags/{release_tag}.zip"
-    zip_path    = os.path.join(target_dir, "temp_repo.zip")
+    import re
+    import zipfile
 
-    if not version_check(repo_name, target_dir, organization_owner) or not release_tag:
-        
-        return False
-    
-    try:
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
         
-        req = request.Request(zip_url, method="GET")
+        comment = zip_ref.comment.decode("ascii", errors="ignore").strip()
 
-        with request.urlopen(req) as response:
-        
-            with open(zip_path, "wb") as f:
-                f.write(response.read())
+    return comment if re.fullmatch(r"[0-9a-f]{40}", comment) else None
 
-        # Extract directly into the target directory
-        extract_zip_flat(zip_path, target_dir)
+def download_release(repo_name:str, organization_owner:str, release_tag:str, zip_path:str) -> tuple[str, int]:
+    """
+    Streams the archive of a release tag to zip_path, hashing it as it arrives so verification
+    never has to re-read the archive from disk. The stream is throttled by the shared download limiter, if one is configured.
+    Returns the archive's sha256 hex digest and size in bytes.
+    """
 
-        # Optionally: clean up
-        os.remove(zip_path)
-        
-        return True
-    
-    except error.HTTPError as e:
-        
-        global_error_handler("HTTP Error", f"A HTTP error occurred while downloading {repo_name}: {e.code} - {e.reason}", logging_level=logging.ERROR)
-        
-        return False
+    import hashlib
+    from bandwidth import download_limiter
+
+    req     = request.Request(release_archive_url(repo_name, organization_owner, release_tag), method="GET")
+    digest  = hashlib.sha256()
+    size    = 0
+    limiter = download_limiter()
+
+    # With a limiter, read no more than one burst at a time so the line never sees more than the configured burst
+    chunk_size = min(settings.download_chunk_size, int(limiter.capacity)) if limiter else settings.download_chunk_size
+
+    with open_url(req) as response:
     
-    except Exception as e:
-        
-        global_error_handler("Installation failure", f"Failed to update {repo_name}: {e}", logging_level=logging.ERROR)
-        
+        with open(zip_path, "wb") as f:
+
+            while chunk := response.read(chunk_size):
+
+                # Concurrent downloads share one bucket, so together they stay under the configured rate
+                if limiter:
+                    limiter.consume(len(chunk))
+
+                digest.update(chunk)
+                f.write(chunk)
+
+                size += len(chunk)
+
+    return digest.hexdigest(), size
+
+def verify_release_archive(repo_name:str, release:dict, organization_token:str, sha256:str, size:int, store:StateStore) -> None:
+    """
+    Checks a downloaded archive's digest before anything is extracted from it.
+    A digest recorded by an earlier verification of the same release is used as the expected value without
+    fetching the checksum asset again; otherwise the release's published checksum is used. Releases that publish
+    no checksum are accepted with a warning. Successful verifications are recorded in the state store.
+    Raises:
+        ValueError: If the digest does not match.
+    """
+
+    import hmac
+
+    release_tag = release["tag_name"]
+    recorded    = store.get_verified_archive(repo_name, release_tag)
+
+    if recorded:
+        expected_sha256, source = recorded["sha256"], "the previously verified digest"
+    else:
+        expected_sha256, source = fetch_expected_sha256(release, repo_name, organization_token), "the release checksum"
+
+    if expected_sha256 is None:
+
+        global_error_handler("Checksum unavailable", f"{repo_name} {release_tag} publishes no checksum for its archive; the archive was not verified.", logging_level=logging.WARNING)
+
+        return
+
+    if not hmac.compare_digest(sha256, expected_sha256):
+        raise ValueError(f"Checksum mismatch for {repo_name} {release_tag}: downloaded {sha256}, expected {expected_sha256} from {source}.")
+
+    store.record_verified_archive(repo_name, release_tag, sha256, size)
+
+    global_error_handler("Checksum verified", f"{repo_name} {release_tag} matches {source}.", logging_level=logging.INFO)
+
+def install_from_content_store(repo_name:str, organization_owner:str, organization_token:str, release:dict, package:str, target_dir:str, store:StateStore) -> str | None:
+    """
+    Installs a release through the content-addressed store in the base directory.
+    The release is materialised once as a hardlinked version tree under `.versions/<package>/<tag>`, and only when
+    that version has not been materialised before (a version kept from earlier is switched to without downloading).
+    The package directory is then switched from the installed version's manifest to the new one, which only
+    re-links files whose content changed.
+    Returns the release's commit SHA.
+    """
+
+    from content_store import objects_directory, version_directory, load_version_manifest
+
+    root_directory  = os.path.dirname(os.path.abspath(target_dir))
+    release_tag     = release["tag_name"]
+    objects_dir     = objects_directory(root_directory)
+    version_dir     = version_directory(root_directory, package, release_tag)
+    version         = load_version_manifest(version_dir)
+
+    if version is None:
+
+        zip_path = version_dir + ".zip"
+
+        os.makedirs(os.path.dirname(version_dir), exist_ok=True)
+
+        try:
+
+            sha256, size = download_release(repo_name, organization_owner, release_tag, zip_path)
+
+            store.record_download_size(package, repo_name, size)
+
+            # Reject a corrupted or tampered archive before anything enters the store
+            verify_release_archive(repo_name, release, organization_token, sha256, size, store)
+
+            extract_zip_flat(zip_path, version_dir, objects_dir=objects_dir)
+
+        finally:
+
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+
+        version = load_version_manifest(version_dir)
+
+    return switch_package_version(root_directory, package, target_dir, release_tag, version, store)
+
+def switch_package_version(root_directory:str, package:str, target_dir:str, release_tag:str, version:dict, store:StateStore) -> str | None:
+    """
+    Points a package directory at a materialised version, touching only the files that differ from the installed one.
+    Returns the version's commit SHA.
+    """
+
+    from content_store import objects_directory, version_directory, load_version_manifest, switch_tree, prune_versions
+
+    installed_tag       = store.get_installed_tag(package)
+    installed_version   = load_version_manifest(version_directory(root_directory, package, installed_tag)) if installed_tag else None
+
+    counters = switch_tree(objects_directory(root_directory), target_dir, version["files"], installed_version["files"] if installed_version else {})
+
+    global_error_handler("Content Store", f"Switched {package} to {release_tag}: {counters['linked']} files linked, {counters['unchanged']} unchanged, {counters['removed']} removed.", logging_level=logging.INFO)
+
+    prune_versions(root_directory, package, settings.content_store_keep_versions, {release_tag})
+
+    return version["commit_sha"]
+
+def rollback_package(root_directory:str, package:str, repo_name:str, release_tag:str) -> bool:
+    """
+    Switches a package back (or forward) to a version kept in the content store, without downloading anything,
+    then installs its requirements and precompiles it like `apply_staged_updates` does.
+    Returns True if the package now runs release_tag.
+    """
+
+    from content_store import version_directory, load_version_manifest
+
+    version = load_version_manifest(version_directory(root_directory, package, release_tag))
+
+    if version is None:
+
+        global_error_handler("Rollback Error", f"{release_tag} of {package} is not kept in the content store.", logging_level=logging.ERROR)
+
         return False
-    
-def version_check(repo_name:str, cwd:str, organization_owner:str) -> bool:
+
+    from install_new_dependencies import update_requirements
+    from package_lock import package_lock
+    from precompile import precompile_package
+
+    started           = time.perf_counter()
+    package_directory = os.path.join(root_directory, package)
+
+    with package_lock(package_directory) as locked, open_state_store(root_directory) as store:
+
+        if not locked:
+
+            global_error_handler("Rollback Error", f"Another updater process is writing to {package}; try again once it finishes.", logging_level=logging.ERROR)
+
+            return False
+
+        commit_sha = switch_package_version(root_directory, package, package_directory, release_tag, version, store)
+
+        # The version switched to may pin different requirements than the one it replaced
+        if not update_requirements(package_directory):
+
+            store.record_failure(package, repo_name, f"Dependency installation failed after rolling back to {release_tag}.")
+
+            return False
+
+        store.record_install(package, repo_name, release_tag, commit_sha, time.perf_counter() - started)
+
+        precompile_package(package_directory)
+
+    return True
+
+def install_updates(repo_name:str, target_dir:str, organization_owner:str, organization_token:str, package:str, store:StateStore, latest_release:dict | None = None) -> bool:
     """
-    Checks if the latest version of the repository is already installed.
-    Args:
-        repo_name (str): The name of the repository to check.
-    Returns:
-        bool: True if the latest version is installed, False otherwise.
-    """    
-    try:
+    Downloads and extracts the GitHub repo as a ZIP into the target_dir (flattened).
+    The installed tag, commit SHA and duration are recorded in the state store only once extraction succeeds;
+    failures increment the package's failure count.
+    A release already fetched by the caller can be passed as latest_release to skip fetching it again.
     
-        api_url = f"https://api.github.com/repos/{organization_owner}/{repo_name}/releases"
+    """
 
-        release_file = "current_release.txt"
+    started        = time.perf_counter()
+    latest_release = latest_release or get_latest_release(repo_name, organization_owner, organization_token)
 
-        release_file_dir = os.path.join(cwd, release_file)
-        
-        req = request.Request(api_url, method="GET")
+    if not latest_release:
 
-        with request.urlopen(req) as response:
-            
-            body = response.read().decode("utf-8")
+        store.record_failure(package, repo_name, "The latest release tag could not be retrieved.")
+
+        return False
+
+    release_tag = latest_release["tag_name"]
+
+    store.record_check(package, repo_name)
+
+    if not version_check(repo_name, package, release_tag, store):
         
-            if response.getcode() == 200:
-                
-                release_data = json.loads(body)
+        return False
 
-                if not release_data:
-                    
-                    global_error_handler("No releases found", "This repository has no releases available.", logging_level=logging.INFO)
+    from package_lock import package_lock
 
-                    return False
+    # A webhook pass, a scheduled update or an apply may target the same package from another process
+    with package_lock(target_dir) as locked:
 
-                if os.path.exists(release_file_dir):
-                    
-                    with open(release_file_dir, "r") as f:
+        if not locked:
 
-                        stored_release = f.read().strip()
+            global_error_handler("Package busy", f"Skipped {package} as another updater process is writing to it.", logging_level=logging.INFO)
 
-                else:
+            return False
 
-                    stored_release = None
+        # The other process may have installed this release while we waited for the metadata
+        if store.get_installed_tag(package) == release_tag:
 
-                latest_release = release_data[0]["tag_name"]
+            return False
 
-                if stored_release != latest_release:
+        return install_release(repo_name, target_dir, organization_owner, organization_token, package, latest_release, store, started)
 
-                    with open(release_file_dir, "w") as f:
+def install_release(repo_name:str, target_dir:str, organization_owner:str, organization_token:str, package:str, latest_release:dict, store:StateStore, started:float) -> bool:
+    """
+    Downloads, verifies and extracts one release into target_dir, under the package lock held by `install_updates`.
+    """
 
-                        f.write(latest_release)
+    release_tag = latest_release["tag_name"]
+    zip_path    = os.path.join(target_dir, "temp_repo.zip")
 
-                        return True
-                    
-                else:
-                    
-                    global_error_handler("No update required", f"The latest version of {repo_name} is already installed.", logging_level=logging.INFO)
-                    
-                    return False
+    try:
 
-            else:
+        if settings.use_content_store:
 
-                raise Exception(f"Failed to fetch latest release data: {response.getcode()} - {response.read().decode('utf-8')}")
-                    
+            commit_sha = install_from_content_store(repo_name, organization_owner, organization_token, latest_release, package, target_dir, store)
+
+        else:
+        
+            sha256, size = download_release(repo_name, organization_owner, release_tag, zip_path)
+
+            store.record_download_size(package, repo_name, size)
+
+            # Reject a corrupted or tampered archive before anything is written into the package
+            verify_release_archive(repo_name, latest_release, organization_token, sha256, size, store)
+
+            # Extract directly into the target directory
+            extract_zip_flat(zip_path, target_dir, incremental=settings.incremental_extraction)
+
+            commit_sha = archive_commit_sha(zip_path)
+
+            # Optionally: clean up
+            os.remove(zip_path)
+
+        store.record_install(package, repo_name, release_tag, commit_sha, time.perf_counter() - started)
+
+        from staging import discard_staged_release
+
+        # A release staged for the maintenance window is superseded by the one just installed
+        discard_staged_release(os.path.dirname(os.path.abspath(target_dir)), package)
+        
+        return True
+    
     except error.HTTPError as e:
         
-        global_error_handler("Version Check Error", f"An error occurred while checking the version of {repo_name}: {e.code} - {e.reason}", logging_level=logging.ERROR)
+        global_error_handler("HTTP Error", f"A HTTP error occurred while downloading {repo_name}: {e.code} - {e.reason}", logging_level=logging.ERROR)
 
+        store.record_failure(package, repo_name, f"HTTP {e.code} - {e.reason}")
+        
         return False
-
+    
     except Exception as e:
         
-        global_error_handler("Version Check Error", f"An unexpected error occurred while checking the version of {repo_name}: {e}", logging_level=logging.ERROR)
+        global_error_handler("Installation failure", f"Failed to update {repo_name}: {e}", logging_level=logging.ERROR)
+
+        store.record_failure(package, repo_name, str(e))
 
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        
         return False
     
+def version_check(repo_name:str, package:str, latest_release:str, store:StateStore) -> bool:
+    """
+    Checks whether the latest release differs from the version recorded in the state store.
+    This is a read-only comparison; the installed tag is only written once an install succeeds.
+    Args:
+        repo_name (str): The name of the repository to check.
+        package (str): The package directory name the repository is installed into.
+        latest_release (str): The latest release tag published on GitHub.
+        store (StateStore): The run's state store.
+    Returns:
+        bool: True if an update is required, False if the latest version is already installed.
+    """    
+
+    if store.get_installed_tag(package) != latest_release:
+
+        return True
+        
+    global_error_handler("No update required", f"The latest version of {repo_name} is already installed.", logging_level=logging.INFO)
+    
+    return False
+    
 def validate_base_directory() -> str | None:
     
     while True:
@@ -224,6 +510,9 @@ def validate_personal_access_token() -> str | None:
     Loops until a valid token is provided or the user cancels.
     Returns the validated token string.
     """
+
+    import getpass
+
     while True:
         try:
             # Prompt user securely
@@ -250,7 +539,7 @@ def validate_personal_access_token() -> str | None:
             )
 
             # Validate token by making request
-            with request.urlopen(req):
+            with open_url(req):
                 global_error_handler(
                     "GitHub token validated",
                     "Personal Access Token validated successfully.",
@@ -301,9 +590,8 @@ def github_owner_validation(personal_access_token: str) -> str | None:
             method="GET"
         )
 
-        with request.urlopen(req) as response:
-            body = response.read().decode("utf-8")
-            authenticated_user = json.loads(body)["login"]
+        body = fetch(req).decode("utf-8")
+        authenticated_user = json.loads(body)["login"]
 
     except error.HTTPError as e:
         if e.code == 401:
@@ -344,7 +632,7 @@ def github_owner_validation(personal_access_token: str) -> str | None:
             req = request.Request(org_url, headers=headers, method="GET")
 
             try:
-                with request.urlopen(req):
+                with open_url(req):
                     owner_exists = True
             except error.HTTPError as e:
                 if e.code == 404:
@@ -358,7 +646,7 @@ def github_owner_validation(personal_access_token: str) -> str | None:
                 req = request.Request(user_url, headers=headers, method="GET")
 
                 try:
-                    with request.urlopen(req):
+                    with open_url(req):
                         owner_exists = True
                 except error.HTTPError as e:
                     if e.code == 404:
@@ -435,8 +723,9 @@ def validate_mql5_directory() -> str | None:
 def check_for_updates():
     
     """
-    Iterates through the specified directories, validates them, and installs updates only if changes are detected.
+    Iterates through the packages in the repository manifest, validates them, and installs updates only if changes are detected.
     The base directory is validated first; if invalid, the script exits early.
+    Installed versions, durations and failures are tracked in the state database in the base directory.
     All exceptions and errors are handled by the `error_handler` module.
     """
     
@@ -444,13 +733,16 @@ def check_for_updates():
     personal_access_token   = validate_personal_access_token()
     organization_owner      = github_owner_validation(personal_access_token)
     mql5_root_directory     = validate_mql5_directory()
-                            
-    REPO_MAPPING = {
 
-        "mql5-script-manager"       : "github-push-script",
-        "vm-status-monitor"         : "azure-vm-monitor",
+    try:
 
-    }
+        REPO_MAPPING = load_repository_manifest(root_directory)
+
+    except (OSError, ValueError) as e:
+
+        global_error_handler("Repository Manifest Error", f"Failed to load the repository manifest: {e}", logging_level=logging.ERROR)
+
+        return
 
     for package in REPO_MAPPING.keys():
         
@@ -464,6 +756,10 @@ def check_for_updates():
             
             os.makedirs(package_directory, exist_ok=True)
 
+            # Provisioning is rare, so its modules are only imported when a package directory is missing
+            from create_env_bundle import create_env_files
+            from install_new_dependencies import update_requirements
+
             if not create_env_files(package_directory, root_directory, personal_access_token, organization_owner, mql5_root_directory):
 
                 return
@@ -480,33 +776,159 @@ def check_for_updates():
 
             global_error_handler("Directory Creation Error", f"Failed to create directory for {package}: {e}")
     
+    run_updates(root_directory, REPO_MAPPING, organization_owner, personal_access_token)
+
+def estimate_download_size(repo_name:str, organization_owner:str, release_tag:str, package:str, store:StateStore) -> int | None:
+    """
+    Estimates the archive size of a release for scheduling, from a HEAD request or, when GitHub doesn't report
+    a length, the size of the package's previous download. Returns ``None`` if neither is known.
+    """
+
+    try:
+
+        # Scheduling should cost next to nothing, so the estimate gets one short attempt
+        size = estimate_archive_size(repo_name, organization_owner, release_tag, timeout=settings.size_estimate_timeout_seconds, max_attempts=1)
+
+    except Exception as e:
+
+        global_error_handler("Size estimate unavailable", f"Could not estimate the download size of {repo_name}: {e}", logging_level=logging.DEBUG)
+
+        size = None
+
+    return size if size is not None else store.get_download_size(package)
+
+def schedule_updates(pending:list[dict], priorities:dict[str, int]) -> list[dict]:
+    """
+    Orders pending updates by manifest priority (higher first), then by estimated size (smallest first),
+    so small fixes aren't held up behind a large archive. Updates of unknown size go last within their priority.
+    """
+
+    return sorted(
+        pending,
+        key=lambda update: (-priorities.get(update["package"], 0), update["size"] is None, update["size"] or 0)
+    )
+
+def run_updates(root_directory:str, repo_mapping:dict[str, str], organization_owner:str, personal_access_token:str) -> list[str]:
+    """
+    Runs one update pass over the given packages in the base directory.
+    Release metadata is checked for every package first; pending updates are then downloaded concurrently
+    (up to ``settings.max_concurrent_downloads``), started in ``schedule_updates`` order.
+    Args:
+        root_directory (str): The base directory holding the package directories and the state database.
+        repo_mapping (dict[str, str]): Package directory name -> GitHub repository name, for the packages to update.
+        organization_owner (str): The GitHub owner of the repositories.
+        personal_access_token (str): The GitHub Personal Access Token.
+    Returns:
+        list[str]: The packages that were updated.
+    """
+
     updated_software_packages = []
+    pending_updates           = []
+    compile_seconds           = 0.0
+
+    # Bound the whole update pass so a stalled connection can't hang the run indefinitely
+    start_run_deadline()
 
     BASE_DIRECTORY = root_directory
             
     try:
-        
-        for software_package in os.listdir(BASE_DIRECTORY):
-            
-            cwd = os.path.join(BASE_DIRECTORY, software_package)
-            
-            if software_package not in REPO_MAPPING.keys():
 
-                global_error_handler("Package skipped", f"Skipped {software_package} as it is not in the repository mapping.", logging_level=logging.INFO)
+        # Each state change is committed as it is made, so concurrent updater processes never wait on this run
+        with open_state_store(BASE_DIRECTORY) as store:
+        
+            for software_package, remote_git_repo in repo_mapping.items():
                 
-                continue
-
-            remote_git_repo = REPO_MAPPING[software_package]
-            
-            if not install_updates(remote_git_repo, cwd, organization_owner, personal_access_token):
+                cwd = os.path.join(BASE_DIRECTORY, software_package)
                 
-                continue
-                                    
-            updated_software_packages.append(software_package)
+                if not os.path.isdir(cwd):
+
+                    global_error_handler("Package skipped", f"Skipped {software_package} as {cwd} does not exist.", logging_level=logging.INFO)
+                    
+                    continue
+
+                store.import_legacy_release_file(software_package, remote_git_repo, cwd)
+
+                latest_release = get_latest_release(remote_git_repo, organization_owner, personal_access_token)
+
+                if not latest_release:
+
+                    store.record_failure(software_package, remote_git_repo, "The latest release tag could not be retrieved.")
+
+                    continue
+
+                store.record_check(software_package, remote_git_repo)
+
+                if not version_check(remote_git_repo, software_package, latest_release["tag_name"], store):
+
+                    continue
+
+                pending_updates.append({"package": software_package, "repo": remote_git_repo, "cwd": cwd, "release": latest_release, "size": None})
+
+            if len(pending_updates) > 1:
+
+                from concurrent.futures import ThreadPoolExecutor
+                from repository_manifest import load_repository_priorities
+
+                with ThreadPoolExecutor(max_workers=len(pending_updates), thread_name_prefix="estimate") as executor:
+
+                    sizes = executor.map(lambda update: estimate_download_size(update["repo"], organization_owner, update["release"]["tag_name"], update["package"], store), pending_updates)
+
+                    for update, size in zip(pending_updates, sizes):
+                        update["size"] = size
+
+                try:
+
+                    priorities = load_repository_priorities(BASE_DIRECTORY)
+
+                except (OSError, ValueError) as e:
+
+                    # The manifest was validated when it was loaded; if it has been broken since, order by size alone
+                    global_error_handler("Repository Manifest Error", f"Ignoring update priorities: {e}", logging_level=logging.WARNING)
+
+                    priorities = {}
+
+                pending_updates = schedule_updates(pending_updates, priorities)
+
+                global_error_handler("Update order", "Updating in this order: " + ", ".join(update["package"] for update in pending_updates), logging_level=logging.INFO)
+
+            if pending_updates:
+
+                from concurrent.futures import ThreadPoolExecutor, as_completed
+                from precompile import precompile_package
+
+                # The executor starts queued updates in submission order, so the schedule decides who gets a slot first
+                with ThreadPoolExecutor(max_workers=max(1, settings.max_concurrent_downloads), thread_name_prefix="update") as executor:
+
+                    futures = {
+                        executor.submit(install_updates, update["repo"], update["cwd"], organization_owner, personal_access_token, update["package"], store, update["release"]): update
+                        for update in pending_updates
+                    }
+
+                    for future in as_completed(futures):
+
+                        if not future.result():
+
+                            continue
+
+                        update = futures[future]
+
+                        updated_software_packages.append(update["package"])
+
+                        # Warm the bytecode cache so the first launch through run.bat doesn't pay for compilation
+                        compile_seconds += precompile_package(update["cwd"])
         
         if updated_software_packages:
 
-            global_error_handler("Updates installed", f"The following packages were updated: {', '.join(updated_software_packages)}", logging_level=logging.INFO)
+            global_error_handler("Updates installed", f"The following packages were updated: {', '.join(updated_software_packages)} (precompiled in {compile_seconds:.2f}s)", logging_level=logging.INFO)
+
+        if settings.use_content_store and updated_software_packages:
+
+            from content_store import collect_garbage
+
+            # Reclaimed once per run, after every extraction into the store has finished
+            collect_garbage(BASE_DIRECTORY)
+
+        report_request_metrics()
                       
     except OSError as e:
 
@@ -515,6 +937,380 @@ def check_for_updates():
     except Exception as e:
                     
         global_error_handler("Error in checking for updates", f"Unfortunately, there was an error in checking for updates. Please find the following error message {e}")
-        
+
+    return updated_software_packages
+
+def prefetch_updates(root_directory:str, repo_mapping:dict[str, str], organization_owner:str, personal_access_token:str) -> list[str]:
+    """
+    Detects, downloads, extracts and verifies new releases into the staging area without touching the packages,
+    so that applying them in the maintenance window costs only a local swap and the requirements step.
+    Returns the packages that have a newly staged release.
+    """
+
+    from staging import STAGED_TREE_DIRECTORY, commit_staged_release, partial_staging_directory, staged_release, verify_staged_tree
+
+    staged_packages = []
+
+    start_run_deadline()
+
+    with open_state_store(root_directory) as store:
+
+        for package, repo_name in repo_mapping.items():
+
+            package_directory = os.path.join(root_directory, package)
+
+            if not os.path.isdir(package_directory):
+                continue
+
+            store.import_legacy_release_file(package, repo_name, package_directory)
+
+            latest_release = get_latest_release(repo_name, organization_owner, personal_access_token)
+
+            if not latest_release:
+
+                store.record_failure(package, repo_name, "The latest release tag could not be retrieved.")
+
+                continue
+
+            release_tag = latest_release["tag_name"]
+
+            store.record_check(package, repo_name)
+
+            if not version_check(repo_name, package, release_tag, store):
+                continue
+
+            already_staged = staged_release(root_directory, package)
+
+            if already_staged and already_staged["tag"] == release_tag:
+
+                global_error_handler("Release already staged", f"{release_tag} of {package} is already staged.", logging_level=logging.INFO)
+
+                continue
+
+            try:
+
+                partial_directory = partial_staging_directory(root_directory, package, release_tag)
+                zip_path          = os.path.join(partial_directory, "release.zip")
+                tree_directory    = os.path.join(partial_directory, STAGED_TREE_DIRECTORY)
+
+                sha256, size = download_release(repo_name, organization_owner, release_tag, zip_path)
+
+                store.record_download_size(package, repo_name, size)
+
+                verify_release_archive(repo_name, latest_release, personal_access_token, sha256, size, store)
+
+                crcs           = {}
+                expected_sizes = extract_zip_flat(zip_path, tree_directory, crcs=crcs)
+                expected_files = {path: {"size": size, "crc": crcs[path]} for path, size in expected_sizes.items()}
+
+                verify_staged_tree(tree_directory, expected_files)
+
+                commit_sha = archive_commit_sha(zip_path)
+
+                os.remove(zip_path)
+
+                commit_staged_release(partial_directory, release_tag, commit_sha, expected_files, store.get_installed_tag(package))
+
+                staged_packages.append(package)
+
+                global_error_handler("Release staged", f"Staged {release_tag} of {package} for the next maintenance window.", logging_level=logging.INFO)
+
+            except error.HTTPError as e:
+
+                global_error_handler("HTTP Error", f"A HTTP error occurred while prefetching {repo_name}: {e.code} - {e.reason}", logging_level=logging.ERROR)
+
+                store.record_failure(package, repo_name, f"HTTP {e.code} - {e.reason}")
+
+            except Exception as e:
+
+                global_error_handler("Prefetch failure", f"Failed to stage {repo_name}: {e}", logging_level=logging.ERROR)
+
+                store.record_failure(package, repo_name, str(e))
+
+    report_request_metrics()
+
+    return staged_packages
+
+def apply_staged_updates(root_directory:str, repo_mapping:dict[str, str], ignore_window:bool = False) -> list[str]:
+    """
+    Applies the releases staged by `prefetch_updates`: moves the changed files of each staged tree into its package directory,
+    installs the requirements and records the new version. Nothing is downloaded except the dependencies.
+    Only runs inside the configured maintenance window unless ignore_window is set.
+    Returns the packages that were updated.
+    """
+
+    from install_new_dependencies import update_requirements
+    from package_lock import package_lock
+    from precompile import precompile_package
+    from staging import apply_staged_tree, discard_staged_release, in_maintenance_window, staged_release
+
+    if not ignore_window and not in_maintenance_window():
+
+        global_error_handler("Outside maintenance window", f"Staged releases are only applied between {settings.maintenance_window_start} and {settings.maintenance_window_end}.", logging_level=logging.INFO)
+
+        return []
+
+    updated_software_packages = []
+
+    with open_state_store(root_directory) as store:
+
+        for package, repo_name in repo_mapping.items():
+
+            staged = staged_release(root_directory, package)
+
+            if not staged:
+                continue
+
+            package_directory = os.path.join(root_directory, package)
+
+            with package_lock(package_directory) as locked:
+
+                if not locked:
+
+                    global_error_handler("Package busy", f"Left the staged release of {package} for the next pass as another updater process is writing to it.", logging_level=logging.INFO)
+
+                    continue
+
+                installed_tag = store.get_installed_tag(package)
+
+                # An update, webhook pass or rollback since staging makes the stage stale; applying it could downgrade
+                if staged["tag"] == installed_tag or staged.get("installed_tag", staged["tag"]) != installed_tag:
+
+                    global_error_handler("Staged release discarded", f"Discarded the staged {staged['tag']} of {package} as {installed_tag} was installed since it was staged.", logging_level=logging.INFO)
+
+                    discard_staged_release(root_directory, package)
+
+                    continue
+
+                try:
+
+                    started = time.perf_counter()
+
+                    applied = apply_staged_tree(staged["tree"], package_directory, staged.get("files"))
+
+                    discard_staged_release(root_directory, package)
+
+                    if not update_requirements(package_directory):
+
+                        store.record_failure(package, repo_name, "Dependency installation failed after applying the staged release.")
+
+                        continue
+
+                    store.record_install(package, repo_name, staged["tag"], staged["commit_sha"], time.perf_counter() - started)
+
+                    updated_software_packages.append(package)
+
+                    global_error_handler("Staged release applied", f"Applied {staged['tag']} of {package} ({applied['moved']} files moved, {applied['skipped']} unchanged, {applied['removed']} removed).", logging_level=logging.INFO)
+
+                    precompile_package(package_directory)
+
+                except Exception as e:
+
+                    global_error_handler("Apply failure", f"Failed to apply the staged release of {package}: {e}", logging_level=logging.ERROR)
+
+                    store.record_failure(package, repo_name, str(e))
+
+    return updated_software_packages
+
+def listen_for_releases(host:str = settings.webhook_host, port:int = settings.webhook_port) -> None:
+    """
+    Runs a local listener for GitHub `release` webhooks and updates only the package whose repository
+    published the release, instead of waiting for the next scheduled `check_for_updates` run.
+    The webhook secret is read from the `GITHUB_WEBHOOK_SECRET` environment variable.
+    """
+
+    from webhook_listener import serve_release_webhooks
+
+    webhook_secret = os.environ.get("GITHUB_WEBHOOK_SECRET")
+
+    if not webhook_secret:
+
+        global_error_handler("Webhook Listener", "GITHUB_WEBHOOK_SECRET is not set; refusing to accept unsigned release events.", logging_level=logging.ERROR)
+
+        return
+
+    root_directory          = validate_base_directory()
+    personal_access_token   = validate_personal_access_token()
+    organization_owner      = github_owner_validation(personal_access_token)
+
+    try:
+
+        REPO_MAPPING = load_repository_manifest(root_directory)
+
+    except (OSError, ValueError) as e:
+
+        global_error_handler("Repository Manifest Error", f"Failed to load the repository manifest: {e}", logging_level=logging.ERROR)
+
+        return
+
+    def update_packages(packages:set[str]) -> None:
+
+        run_updates(root_directory, {package: REPO_MAPPING[package] for package in packages}, organization_owner, personal_access_token)
+
+    serve_release_webhooks(host, port, webhook_secret.encode("utf-8"), REPO_MAPPING, update_packages)
+
+def prefetch_releases() -> None:
+    """
+    Interactive entry point for `prefetch_updates` over the repository manifest.
+    """
+
+    root_directory          = validate_base_directory()
+    personal_access_token   = validate_personal_access_token()
+    organization_owner      = github_owner_validation(personal_access_token)
+
+    try:
+
+        REPO_MAPPING = load_repository_manifest(root_directory)
+
+    except (OSError, ValueError) as e:
+
+        global_error_handler("Repository Manifest Error", f"Failed to load the repository manifest: {e}", logging_level=logging.ERROR)
+
+        return
+
+    prefetch_updates(root_directory, REPO_MAPPING, organization_owner, personal_access_token)
+
+def apply_releases(ignore_window:bool = False) -> None:
+    """
+    Interactive entry point for `apply_staged_updates` over the repository manifest. No GitHub credentials are needed.
+    """
+
+    root_directory = validate_base_directory()
+
+    try:
+
+        REPO_MAPPING = load_repository_manifest(root_directory)
+
+    except (OSError, ValueError) as e:
+
+        global_error_handler("Repository Manifest Error", f"Failed to load the repository manifest: {e}", logging_level=logging.ERROR)
+
+        return
+
+    apply_staged_updates(root_directory, REPO_MAPPING, ignore_window)
+
+def show_plan(root_directory:str | None = None, as_json:bool = False) -> int:
+    """
+    Read-only entry point reporting which packages are behind, for dashboards polling on a schedule.
+    It never prompts: the base directory, token and owner come from the `BASE_DIRECTORY`, `GITHUB_TOKEN` and
+    `GITHUB_USERNAME` environment variables (the same keys written to each package's .env file).
+    Returns a process exit code.
+    """
+
+    from release_plan import build_plan, print_plan
+
+    root_directory          = root_directory or os.environ.get("BASE_DIRECTORY")
+    personal_access_token   = os.environ.get("GITHUB_TOKEN")
+    organization_owner      = os.environ.get("GITHUB_USERNAME")
+
+    missing = [name for name, value in (("BASE_DIRECTORY", root_directory), ("GITHUB_TOKEN", personal_access_token), ("GITHUB_USERNAME", organization_owner)) if not value]
+
+    if missing:
+
+        global_error_handler("Plan Error", f"Missing environment variables: {', '.join(missing)}", logging_level=logging.ERROR)
+
+        print(f"Missing environment variables: {', '.join(missing)}")
+
+        return 2
+
+    try:
+
+        REPO_MAPPING = load_repository_manifest(root_directory)
+
+    except (OSError, ValueError) as e:
+
+        global_error_handler("Repository Manifest Error", f"Failed to load the repository manifest: {e}", logging_level=logging.ERROR)
+
+        return 2
+
+    plan = build_plan(root_directory, REPO_MAPPING, organization_owner, personal_access_token)
+
+    print_plan(plan, as_json)
+
+    return 1 if any(plan_entry.get("error") for plan_entry in plan) else 0
+
+def rollback_release(root_directory:str | None, package:str, release_tag:str) -> int:
+    """
+    Entry point switching a package to a version kept in the content store. Returns a process exit code.
+    """
+
+    root_directory = root_directory or validate_base_directory()
+
+    try:
+
+        REPO_MAPPING = load_repository_manifest(root_directory)
+
+    except (OSError, ValueError) as e:
+
+        global_error_handler("Repository Manifest Error", f"Failed to load the repository manifest: {e}", logging_level=logging.ERROR)
+
+        return 2
+
+    if package not in REPO_MAPPING:
+
+        global_error_handler("Rollback Error", f"{package} is not in the repository manifest.", logging_level=logging.ERROR)
+
+        return 2
+
+    return 0 if rollback_package(root_directory, package, REPO_MAPPING[package], release_tag) else 1
+
+def install_termination_handlers() -> None:
+    """
+    Kills any running subprocess (pip, compileall) when the updater receives SIGINT or SIGTERM, then stops the updater.
+    """
+
+    import signal
+    import sys
+
+    def handle_termination(signum, frame):
+
+        # Only a run that has imported the subprocess runner can have commands to kill
+        package_management = sys.modules.get("package_management")
+
+        if package_management:
+            package_management.cancel_running_commands()
+
+        global_error_handler("Updater stopped", f"Received {signal.Signals(signum).name}, running commands were cancelled.", logging_level=logging.WARNING)
+
+        if signum == signal.SIGINT:
+            raise KeyboardInterrupt
+
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGINT, handle_termination)
+    signal.signal(signal.SIGTERM, handle_termination)
+
 if __name__ == "__main__":
-    check_for_updates()
\ No newline at end of file
+
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Installs the latest GitHub releases of the managed packages.")
+    parser.add_argument("command", nargs="?", choices=["update", "listen", "prefetch", "apply", "plan", "rollback"], default="update", help="'update' runs one update pass (default); 'listen' waits for release webhooks; 'prefetch' stages new releases; 'apply' installs staged releases during the maintenance window; 'plan' reports pending updates without changing anything; 'rollback' switches a package to a version kept in the content store.")
+    parser.add_argument("--host", default=settings.webhook_host, help="Address the webhook listener binds to.")
+    parser.add_argument("--port", type=int, default=settings.webhook_port, help="Port the webhook listener binds to.")
+    parser.add_argument("--ignore-window", action="store_true", help="Apply staged releases even outside the maintenance window.")
+    parser.add_argument("--base-directory", help="Base directory for 'plan' (defaults to the BASE_DIRECTORY environment variable) and 'rollback'.")
+    parser.add_argument("--json", action="store_true", help="Print the plan as JSON.")
+    parser.add_argument("--package", help="Package to switch for 'rollback'.")
+    parser.add_argument("--tag", help="Release tag to switch to for 'rollback'.")
+    args = parser.parse_args()
+
+    install_termination_handlers()
+
+    if args.command == "listen":
+        listen_for_releases(args.host, args.port)
+    elif args.command == "prefetch":
+        prefetch_releases()
+    elif args.command == "apply":
+        apply_releases(args.ignore_window)
+    elif args.command == "plan":
+        sys.exit(show_plan(args.base_directory, args.json))
+    elif args.command == "rollback":
+
+        if not args.package or not args.tag:
+            parser.error("rollback requires --package and --tag")
+
+        sys.exit(rollback_release(args.base_directory, args.package, args.tag))
+    else:
+        check_for_updates()
\ No newline at end of file
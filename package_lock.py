@@ -0,0 +1,63 @@
+import os
+from contextlib import contextmanager
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+def package_lock_path(package_directory: str) -> str:
+    """
+    Returns the lock file of a package, kept under the base directory rather than in the package tree
+    so extraction and version switches never touch it.
+    """
+
+    root_directory, package = os.path.split(os.path.normpath(package_directory))
+
+    return os.path.join(root_directory, settings.lock_directory_name, package + ".lock")
+
+def _try_lock(lock_file) -> bool:
+
+    try:
+
+        if os.name == "nt":
+
+            import msvcrt
+
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+
+        else:
+
+            import fcntl
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    except OSError:
+
+        return False
+
+    return True
+
+@contextmanager
+def package_lock(package_directory: str):
+    """
+    Holds a package's exclusive lock for the duration of the ``with`` block, so a scheduled ``update``,
+    a webhook pass, ``apply`` and ``rollback`` never write into the same package directory at once.
+    Yields ``True`` if the lock was acquired, ``False`` if another updater process or thread holds it;
+    the caller skips the package in that case and the next pass picks it up. The OS releases the lock
+    if the holder dies, so a crashed run never leaves a package locked.
+    """
+
+    lock_path = package_lock_path(package_directory)
+
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+
+    with open(lock_path, "a+b") as lock_file:
+
+        if not _try_lock(lock_file):
+
+            yield False
+
+            return
+
+        # Closing the file releases the lock
+        yield True
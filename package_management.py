@@ -3,32 +3,164 @@ import subprocess
 from subprocess import CompletedProcess
 import importlib.util
 import sys
+import threading
+import time
+from collections import deque
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
 
 #print("Script started from:", sys.argv[0])
 
-def run_command(command:list[str], cwd:str = None) -> CompletedProcess | None:
+# Number of trailing output lines kept per command for error reporting; everything else is only logged
+OUTPUT_TAIL_LINES = 50
+
+_command_slots      = threading.BoundedSemaphore(settings.max_concurrent_commands)
+_active_processes   = set()
+# Re-entrant so the SIGINT/SIGTERM handler can cancel commands even if it interrupts the main thread holding the lock
+_active_lock        = threading.RLock()
+_cancelled          = threading.Event()
+
+# Number of recent commands kept in command_metrics, so a long-running listener doesn't grow it without bound
+COMMAND_METRICS_LIMIT = 500
+
+# One entry per recently executed command: command, cwd, returncode, duration, timed_out, cancelled
+command_metrics     = deque(maxlen=COMMAND_METRICS_LIMIT)
+
+def cancel_running_commands() -> None:
+    """
+    Kills every running command and makes later calls to ``run_command`` return ``None`` without starting.
+    Called from the updater's SIGINT/SIGTERM handler so an interrupted run doesn't leave pip or compileall behind.
     """
-    Executes a shell command in the specified working directory.
+
+    _cancelled.set()
+
+    with _active_lock:
+
+        for process in _active_processes:
+
+            process.kill()
+
+# Command output goes to the log file through its own handler: global_error_handler reconfigures the root logger
+# at the level of its latest call, which would otherwise drop INFO output after any warning from another thread
+_output_logger      = logging.getLogger(__name__ + ".output")
+_output_logger_lock = threading.Lock()
+
+def _command_output_logger() -> logging.Logger:
+
+    with _output_logger_lock:
+
+        if not _output_logger.handlers:
+
+            handler = logging.FileHandler("log.log", mode="a")
+            handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+
+            _output_logger.addHandler(handler)
+            _output_logger.setLevel(logging.DEBUG)
+            _output_logger.propagate = False
+
+    return _output_logger
+
+def _stream_output(process: subprocess.Popen, command_name: str, tail: deque, logging_level: int) -> None:
+
+    output_logger = _command_output_logger()
+
+    for line in process.stdout:
+
+        line = line.rstrip()
+
+        tail.append(line)
+
+        output_logger.log(logging_level, "[%s] %s", command_name, line)
+
+def run_command(command:list[str], cwd:str = None, timeout:float | None = settings.command_timeout_seconds, logging_level:int = logging.INFO) -> CompletedProcess | None:
+    """
+    Executes a command in the specified working directory.
     Args:
         command (list[str]): The command and its arguments to execute as a list of strings.
         cwd (str): The working directory in which to run the command.
+        timeout (float | None): Seconds before the command is killed. ``None`` waits indefinitely.
+        logging_level (int): Level at which the command's output lines are logged.
     Returns:
         CompletedProcess | None: The result of the executed command as a CompletedProcess object,
-        or None if the specified directory is invalid.
-    Raises:
-        Exception: Propagates any exception encountered during command execution after reporting it.
+        or None if the command could not be started or commands have been cancelled.
     Notes:
-        - If the provided working directory is not valid, the function returns None.
-        - Errors encountered during execution are reported using the error_handler before being raised.
+        - At most ``settings.max_concurrent_commands`` commands run at once; further calls block for a slot.
+        - stdout and stderr are merged and streamed line by line into the logging system rather than
+          held in memory. Only the last ``OUTPUT_TAIL_LINES`` lines are returned in ``stdout`` for error messages.
+        - A command that exceeds its timeout is killed and returns a non-zero return code.
+        - Return code and duration of each command are appended to ``command_metrics``, which keeps the last ``COMMAND_METRICS_LIMIT``.
     """
 
-    try:
-        result = subprocess.run(command, cwd=cwd, text=True, capture_output=True)
+    command_name = command[0] if command else ""
+
+    with _command_slots:
+
+        if _cancelled.is_set():
+
+            return None
+
+        started = time.perf_counter()
+
+        try:
+            process = subprocess.Popen(
+                command,
+                cwd=cwd,
+                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=1
+            )
+
+        except Exception as e:
+
+            global_error_handler("Run Command Exception", f"Failed to start {command_name}: {e}", logging_level=logging.ERROR)
+
+            return None
+
+        with _active_lock:
+            _active_processes.add(process)
+
+        tail      = deque(maxlen=OUTPUT_TAIL_LINES)
+        reader    = threading.Thread(target=_stream_output, args=(process, command_name, tail, logging_level), daemon=True)
+        timed_out = False
+
+        reader.start()
+
+        try:
+            process.wait(timeout=timeout)
+
+        except subprocess.TimeoutExpired:
+
+            timed_out = True
+
+            process.kill()
+            process.wait()
+
+        finally:
+
+            # A killed command's children can keep the pipe open, so don't wait on the reader forever
+            reader.join(timeout=5 if timed_out else None)
+
+            with _active_lock:
+                _active_processes.discard(process)
+
+        duration = time.perf_counter() - started
+
+        command_metrics.append({
+
+            "command"       : command,
+            "cwd"           : cwd,
+            "returncode"    : process.returncode,
+            "duration"      : duration,
+            "timed_out"     : timed_out,
+            "cancelled"     : _cancelled.is_set(),
+
+        })
 
-        return result
-    
-    except Exception as e:
+        if timed_out:
 
-        global_error_handler.error_handler.report_error("Run Command Exception", str(e))
+            global_error_handler("Run Command Timeout", f"{command_name} was killed after exceeding its {timeout}s timeout.", logging_level=logging.ERROR)
 
-        return None
+        return CompletedProcess(command, process.returncode, stdout="\n".join(tail), stderr=None)
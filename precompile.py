@@ -0,0 +1,108 @@
+import compileall
+import os
+import re
+import time
+from error_handler import global_error_handler
+import logging
+import settings
+from package_management import run_command
+
+logger = logging.getLogger(__name__)
+
+# Never descend into the package's own virtual environment when compiling the release tree
+VENV_EXCLUDE = re.compile(r"[/\\]\.venv([/\\]|$)")
+
+def venv_python(cwd: str) -> str | None:
+    """
+    Returns the package's virtual environment interpreter, or ``None`` if the package has no virtual environment.
+    """
+
+    python_executable = os.path.join(cwd, ".venv", "Scripts", "python.exe")
+
+    return python_executable if os.path.exists(python_executable) else None
+
+def precompile_tree(directory: str, workers: int = settings.precompile_workers) -> bool:
+    """
+    Compiles every module in the extracted release tree into ``__pycache__`` using a parallel worker pool.
+    The tree is compiled with the package's own venv interpreter, since ``run.bat`` imports it under that
+    Python and bytecode is only used by the version that wrote it. Without a venv the updater's interpreter is used.
+    Args:
+        directory (str): The package directory holding the extracted release.
+        workers (int, optional): Number of worker processes; ``0`` uses one per CPU.
+    Returns:
+        bool: ``True`` if every module compiled; otherwise ``False``.
+    Notes:
+        - compileall only rewrites a ``.pyc`` whose recorded source mtime and size no longer match,
+          so unchanged modules keep their existing bytecode.
+    """
+
+    python_executable = venv_python(directory)
+
+    if python_executable is None:
+
+        try:
+            return bool(compileall.compile_dir(directory, quiet=1, workers=workers, rx=VENV_EXCLUDE))
+
+        except Exception as e:
+
+            global_error_handler("Precompilation Error", f"Failed to precompile {directory}: {type(e).__name__}: {e}", logging_level=logging.ERROR)
+
+            return False
+
+    result = run_command([python_executable, "-m", "compileall", "-q", "-j", str(workers), "-x", VENV_EXCLUDE.pattern, directory])
+
+    if result is None or result.returncode != 0:
+
+        error_output = result.stdout if result else "command could not be started"
+
+        global_error_handler("Precompilation Error", f"Failed to precompile {directory}: {error_output}", logging_level=logging.ERROR)
+
+        return False
+
+    return True
+
+def precompile_site_packages(cwd: str, workers: int = settings.precompile_workers) -> bool:
+    """
+    Compiles the virtual environment's site-packages with the venv's own interpreter,
+    so the bytecode matches the Python version the managed application runs under.
+    """
+
+    python_executable = venv_python(cwd)
+    site_packages     = os.path.join(cwd, ".venv", "Lib", "site-packages")
+
+    if python_executable is None or not os.path.isdir(site_packages):
+
+        global_error_handler("Precompilation Skipped", f"No virtual environment found in {cwd}.", logging_level=logging.WARNING)
+
+        return False
+
+    result = run_command([python_executable, "-m", "compileall", "-q", "-j", str(workers), site_packages])
+
+    if result is None or result.returncode != 0:
+
+        error_output = result.stdout if result else "command could not be started"
+
+        global_error_handler("Precompilation Error", f"Failed to precompile site-packages in {cwd}: {error_output}", logging_level=logging.ERROR)
+
+        return False
+
+    return True
+
+def precompile_package(cwd: str) -> float:
+    """
+    Runs the post-install precompilation stage for a package directory.
+    Returns the elapsed compile time in seconds so it can be reported in the run summary.
+    """
+
+    started = time.perf_counter()
+
+    precompile_tree(cwd)
+
+    if settings.precompile_site_packages:
+        precompile_site_packages(cwd)
+
+    elapsed = time.perf_counter() - started
+
+    global_error_handler("Precompilation", f"Precompiled {cwd} in {elapsed:.2f}s.", logging_level=logging.INFO)
+
+    return elapsed
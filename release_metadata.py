@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import time
+from urllib import request, error
+from request_policy import fetch, fetch_with_headers, open_url
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+def github_api_headers(organization_token: str) -> dict[str, str]:
+
+    return {
+
+        "User-Agent"    : "Updater/1.0",
+        "Authorization" : f"token {organization_token}",
+
+    }
+
+def release_archive_url(repo_name: str, organization_owner: str, release_tag: str) -> str:
+
+    return f"https://github.com/{organization_owner}/{repo_name}/archive/refs/tags/{release_tag}.zip"
+
+def fetch_latest_release(repo_name: str, organization_owner: str, organization_token: str, etag: str | None = None) -> tuple[dict | None, str | None]:
+    """
+    Fetches the latest release of a repository from the GitHub API.
+    Args:
+        etag (str | None): ETag of a cached copy. If GitHub reports it unchanged, no body is transferred
+            and the request does not count against the rate limit.
+    Returns:
+        tuple[dict | None, str | None]: The release (``None`` if unchanged since ``etag``) and its ETag.
+    Raises:
+        error.HTTPError | error.URLError: If the request fails.
+    """
+
+    url     = f"https://api.github.com/repos/{organization_owner}/{repo_name}/releases/latest"
+    headers = github_api_headers(organization_token)
+
+    if etag:
+        headers["If-None-Match"] = etag
+
+    req = request.Request(url, headers=headers, method="GET")
+
+    try:
+        body, response_headers = fetch_with_headers(req, hedge=True)
+
+    except error.HTTPError as e:
+
+        if etag and e.code == 304:
+            return None, etag
+
+        raise
+
+    return json.loads(body.decode("utf-8")), response_headers.get("ETag")
+
+def find_checksum_asset(release: dict, file_names: set[str]) -> dict | None:
+    """
+    Returns the release asset publishing the sha256 checksum of the tag archive, or ``None`` if the release has none.
+    Only the generic checksum files in ``settings.checksum_asset_names`` and a ``.sha256`` file named after the archive
+    qualify; ``.sha256`` files of other release assets (binaries, installers) describe those assets, not the archive.
+    """
+
+    archive_checksum_names = {file_name + ".sha256" for file_name in file_names}
+
+    for asset in release.get("assets", []):
+
+        name = asset.get("name", "")
+
+        if name in settings.checksum_asset_names or name in archive_checksum_names:
+            return asset
+
+    return None
+
+def archive_file_names(repo_name: str, release_tag: str) -> set[str]:
+    """
+    Names the tag archive may be listed under in a checksum file. GitHub names the archive after the repository
+    and the tag, dropping a leading "v" from version tags.
+    """
+
+    version = release_tag[1:] if re.match(r"v\d", release_tag) else release_tag
+
+    return {f"{repo_name}-{version}.zip", f"{repo_name}-{release_tag}.zip", f"{release_tag}.zip"}
+
+def parse_checksum_file(content: str, file_names: set[str], unnamed_digest: bool = False) -> str | None:
+    """
+    Finds the sha256 of the archive in a checksum file in sha256sum format (``<digest>  [*]<file name>``).
+    Only a digest listed under one of file_names is accepted. With unnamed_digest set (for a ``.sha256`` file
+    named after the archive), a line holding just a digest is accepted too.
+    """
+
+    for line in content.splitlines():
+
+        parts = line.strip().split(maxsplit=1)
+
+        if not parts or not re.fullmatch(r"[0-9a-fA-F]{64}", parts[0]):
+            continue
+
+        file_name = parts[1].lstrip("*").strip() if len(parts) > 1 else None
+
+        if file_name in file_names or (unnamed_digest and file_name is None):
+            return parts[0].lower()
+
+    return None
+
+def fetch_expected_sha256(release: dict, repo_name: str, organization_token: str) -> str | None:
+    """
+    Downloads the release's checksum asset and returns the published sha256 of the tag archive.
+    Returns ``None`` if the release publishes no checksum for the archive, including a checksum file
+    that only lists the release's other assets.
+    """
+
+    file_names = archive_file_names(repo_name, release["tag_name"])
+    asset      = find_checksum_asset(release, file_names)
+
+    if not asset:
+        return None
+
+    headers           = github_api_headers(organization_token)
+    headers["Accept"] = "application/octet-stream"
+
+    # Asset downloads redirect to a CDN on another host; the request policy drops the token on that redirect
+    req = request.Request(asset["url"], headers=headers, method="GET")
+
+    content = fetch(req).decode("utf-8", errors="replace")
+
+    return parse_checksum_file(content, file_names, unnamed_digest=asset["name"] not in settings.checksum_asset_names)
+
+def estimate_archive_size(repo_name: str, organization_owner: str, release_tag: str, timeout: float = settings.request_timeout_seconds, max_attempts: int = settings.request_max_attempts) -> int | None:
+    """
+    Estimates the download size of a release archive with a HEAD request.
+    Returns ``None`` when the server does not report a length (archives are often generated on the fly).
+    """
+
+    req = request.Request(release_archive_url(repo_name, organization_owner, release_tag), method="HEAD")
+
+    with open_url(req, timeout=timeout, max_attempts=max_attempts) as response:
+
+        content_length = response.headers.get("Content-Length")
+
+    return int(content_length) if content_length else None
+
+def load_release_cache(root_directory: str) -> dict:
+    """
+    Loads the release metadata cache from the base directory. A missing or unreadable cache is treated as empty.
+    Entries are keyed by repository name and hold ``tag``, ``etag``, ``fetched_at`` and ``archive_size``.
+    """
+
+    cache_path = os.path.join(root_directory, settings.release_cache_filename)
+
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    except (OSError, ValueError):
+        return {}
+
+def save_release_cache(root_directory: str, cache: dict) -> None:
+
+    cache_path = os.path.join(root_directory, settings.release_cache_filename)
+    temp_path  = cache_path + ".tmp"
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+
+    os.replace(temp_path, cache_path)
+
+def is_cache_fresh(entry: dict | None, ttl_seconds: float | None = None) -> bool:
+
+    ttl_seconds = settings.release_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+
+    return bool(entry) and time.time() - entry.get("fetched_at", 0) < ttl_seconds
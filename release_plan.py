@@ -0,0 +1,217 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib import error
+from error_handler import global_error_handler
+from release_metadata import fetch_latest_release, estimate_archive_size, load_release_cache, save_release_cache, is_cache_fresh
+from request_policy import start_run_deadline
+from state_store import open_state_store
+from staging import staged_release
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+def installed_state(root_directory: str, repo_mapping: dict[str, str]) -> tuple[dict[str, str | None], dict[str, int | None]]:
+    """
+    Reads the installed tag and the size of the previous download of every package without writing anything:
+    the state database is opened read-only and packages not yet in it fall back to their legacy ``current_release.txt``.
+    """
+
+    store = open_state_store(root_directory, read_only=True)
+    tags  = {}
+    sizes = {}
+
+    try:
+
+        for package in repo_mapping:
+
+            tags[package]  = store.get_installed_tag(package) if store else None
+            sizes[package] = store.get_download_size(package) if store else None
+
+            legacy_release_file = os.path.join(root_directory, package, settings.legacy_release_filename)
+
+            if tags[package] is None and os.path.exists(legacy_release_file):
+
+                with open(legacy_release_file, "r") as f:
+                    tags[package] = f.read().strip() or None
+
+    finally:
+
+        if store:
+            store.connection.close()
+
+    return tags, sizes
+
+def _plan_package(package: str, repo_name: str, installed_tag: str | None, previous_size: int | None, cache_entry: dict | None, root_directory: str, organization_owner: str, organization_token: str) -> tuple[dict, dict | None]:
+    """
+    Builds the plan entry of one package. Returns the entry and the refreshed cache entry (``None`` if the cache was used as is).
+    When GitHub reports no archive size, the size of the package's previous download is shown as the estimate.
+    """
+
+    refreshed_entry = None
+
+    if is_cache_fresh(cache_entry):
+
+        latest_tag      = cache_entry["tag"]
+        metadata_source = "cache"
+
+    else:
+
+        release, etag = fetch_latest_release(repo_name, organization_owner, organization_token, etag=(cache_entry or {}).get("etag"))
+
+        if release is None:
+
+            # GitHub reported the cached release unchanged
+            refreshed_entry = dict(cache_entry, fetched_at=time.time())
+            metadata_source = "revalidated"
+
+        else:
+
+            refreshed_entry = {"tag": release.get("tag_name"), "etag": etag, "fetched_at": time.time(), "archive_size": None}
+            metadata_source = "network"
+
+        latest_tag = refreshed_entry["tag"]
+
+    entry          = refreshed_entry or cache_entry
+    pending        = bool(latest_tag) and latest_tag != installed_tag
+    staged         = staged_release(root_directory, package)
+    download_bytes = None
+
+    if pending:
+
+        # An archive's size never changes for a given tag, so it is cached alongside the tag
+        if entry.get("archive_tag") == latest_tag:
+
+            download_bytes = entry.get("archive_size")
+
+        else:
+
+            download_bytes  = estimate_archive_size(repo_name, organization_owner, latest_tag)
+            refreshed_entry = dict(entry, archive_tag=latest_tag, archive_size=download_bytes)
+
+        if download_bytes is None:
+            download_bytes = previous_size
+
+    plan_entry = {
+
+        "package"                   : package,
+        "repo"                      : repo_name,
+        "installed_tag"             : installed_tag,
+        "latest_tag"                : latest_tag,
+        "update_pending"            : pending,
+        "staged_tag"                : staged["tag"] if staged else None,
+        "estimated_download_bytes"  : download_bytes,
+        "metadata_source"           : metadata_source,
+        "error"                     : None,
+
+    }
+
+    return plan_entry, refreshed_entry
+
+def build_plan(root_directory: str, repo_mapping: dict[str, str], organization_owner: str, organization_token: str, time_budget: float = settings.plan_time_budget_seconds) -> list[dict]:
+    """
+    Compares the installed state of every managed package against its latest release, in parallel and within
+    a strict time budget. Nothing is installed, staged or written to the state database; only the release
+    metadata cache is refreshed.
+    Args:
+        root_directory (str): The base directory.
+        repo_mapping (dict[str, str]): Package directory name -> GitHub repository name.
+        organization_owner (str): The GitHub owner of the repositories.
+        organization_token (str): The GitHub Personal Access Token.
+        time_budget (float): Seconds after which unfinished packages are reported with an error.
+    Returns:
+        list[dict]: One entry per package with the installed and latest tag, whether an update is pending,
+        the staged tag and the estimated download size.
+    """
+
+    start_run_deadline(time_budget)
+
+    tags, sizes = installed_state(root_directory, repo_mapping)
+    cache       = load_release_cache(root_directory)
+    executor    = ThreadPoolExecutor(max_workers=settings.plan_max_workers)
+
+    futures = {
+
+        executor.submit(_plan_package, package, repo_name, tags[package], sizes[package], cache.get(repo_name), root_directory, organization_owner, organization_token): package
+        for package, repo_name in repo_mapping.items()
+
+    }
+
+    done, _ = wait(futures, timeout=time_budget)
+
+    # Don't wait for stragglers; their requests are bounded by the run deadline anyway
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    plan          = []
+    cache_changed = False
+
+    for future, package in futures.items():
+
+        repo_name = repo_mapping[package]
+
+        if future not in done:
+
+            plan.append({"package": package, "repo": repo_name, "installed_tag": tags[package], "error": f"No answer within the {time_budget}s time budget."})
+
+            continue
+
+        try:
+            plan_entry, refreshed_entry = future.result()
+
+        except error.HTTPError as e:
+
+            plan.append({"package": package, "repo": repo_name, "installed_tag": tags[package], "error": f"HTTP {e.code} - {e.reason}"})
+
+            continue
+
+        except Exception as e:
+
+            plan.append({"package": package, "repo": repo_name, "installed_tag": tags[package], "error": f"{type(e).__name__}: {e}"})
+
+            continue
+
+        if refreshed_entry:
+
+            cache[repo_name] = refreshed_entry
+            cache_changed    = True
+
+        plan.append(plan_entry)
+
+    if cache_changed:
+
+        try:
+            save_release_cache(root_directory, cache)
+
+        except OSError as e:
+            global_error_handler("Release Cache Error", f"Failed to save the release metadata cache: {e}", logging_level=logging.WARNING)
+
+    return sorted(plan, key=lambda plan_entry: plan_entry["package"])
+
+def format_plan(plan: list[dict]) -> str:
+    """
+    Formats a plan as a plain-text table for the console.
+    """
+
+    lines = [f"{'PACKAGE':<30} {'INSTALLED':<15} {'LATEST':<15} {'STAGED':<15} {'DOWNLOAD':>12}"]
+
+    for plan_entry in plan:
+
+        if plan_entry.get("error"):
+
+            lines.append(f"{plan_entry['package']:<30} {plan_entry.get('installed_tag') or '-':<15} ERROR: {plan_entry['error']}")
+
+            continue
+
+        download_bytes = plan_entry["estimated_download_bytes"]
+        download       = f"{download_bytes / 1024:.0f} KiB" if download_bytes is not None else ("unknown" if plan_entry["update_pending"] else "-")
+        latest         = plan_entry["latest_tag"] if plan_entry["update_pending"] else "up to date"
+
+        lines.append(f"{plan_entry['package']:<30} {plan_entry['installed_tag'] or '-':<15} {latest:<15} {plan_entry['staged_tag'] or '-':<15} {download:>12}")
+
+    return "\n".join(lines)
+
+def print_plan(plan: list[dict], as_json: bool = False) -> None:
+
+    print(json.dumps(plan, indent=2) if as_json else format_plan(plan))
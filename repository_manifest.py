@@ -0,0 +1,90 @@
+import os
+import json
+from error_handler import global_error_handler
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+def _read_manifest_entries(manifest_path: str) -> list[dict]:
+    """
+    Reads and validates the manifest's repository entries.
+    Raises:
+        ValueError: If an entry lacks ``package`` or ``repo``, lists a package twice, or has a non-integer ``priority``.
+    """
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    entries  = []
+    packages = set()
+
+    for entry in manifest.get("repositories", []):
+
+        package   = entry.get("package")
+        repo_name = entry.get("repo")
+        priority  = entry.get("priority", 0)
+
+        if not package or not repo_name:
+            raise ValueError(f"Manifest entry {entry} must define both 'package' and 'repo'.")
+
+        if package in packages:
+            raise ValueError(f"Package '{package}' is listed more than once in {manifest_path}.")
+
+        # bool is an int subclass, but "priority": true is a mistake rather than a priority of 1
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ValueError(f"Manifest entry for '{package}' has priority {priority!r}; it must be an integer.")
+
+        packages.add(package)
+
+        entries.append({"package": package, "repo": repo_name, "priority": priority})
+
+    return entries
+
+def load_repository_manifest(root_directory: str) -> dict[str, str]:
+    """
+    Loads the managed repository set from the manifest file in the base directory.
+    The manifest is a JSON file of the form::
+
+        {
+            "repositories": [
+                {"package": "mql5-script-manager", "repo": "github-push-script", "priority": 10},
+                {"package": "vm-status-monitor",   "repo": "azure-vm-monitor"}
+            ]
+        }
+
+    The optional integer ``priority`` is validated here and read by ``load_repository_priorities``.
+
+    Args:
+        root_directory (str): The base directory holding the manifest and the package directories.
+    Returns:
+        dict[str, str]: Package directory name -> GitHub repository name. Falls back to
+        ``settings.default_repo_mapping`` if the manifest does not exist.
+    Raises:
+        ValueError: If the manifest exists but is malformed.
+    """
+
+    manifest_path = os.path.join(root_directory, settings.repository_manifest_filename)
+
+    if not os.path.exists(manifest_path):
+
+        global_error_handler("Repository Manifest", f"No manifest found at {manifest_path}, using the default repository mapping.", logging_level=logging.INFO)
+
+        return dict(settings.default_repo_mapping)
+
+    return {entry["package"]: entry["repo"] for entry in _read_manifest_entries(manifest_path)}
+
+def load_repository_priorities(root_directory: str) -> dict[str, int]:
+    """
+    Returns the optional per-package ``priority`` from the manifest (default 0). When several packages have
+    updates, higher priorities are downloaded first; equal priorities go smallest download first.
+    Raises:
+        ValueError: If the manifest is malformed.
+    """
+
+    manifest_path = os.path.join(root_directory, settings.repository_manifest_filename)
+
+    if not os.path.exists(manifest_path):
+        return {}
+
+    return {entry["package"]: entry["priority"] for entry in _read_manifest_entries(manifest_path)}
@@ -0,0 +1,291 @@
+from urllib import request, error
+from collections import deque
+import random
+import threading
+import time
+from error_handler import global_error_handler
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying for idempotent requests; everything else is returned to the caller immediately
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+IDEMPOTENT_METHODS     = {"GET", "HEAD"}
+
+_run_deadline       = None
+_latency_samples    = deque(maxlen=200)
+_latency_lock       = threading.Lock()
+_hedge_executor     = None
+_hedge_lock         = threading.Lock()
+
+# Counters for the run summary and the benchmark
+request_metrics     = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0}
+
+class _DropAuthorizationOnRedirect(request.HTTPRedirectHandler):
+    """
+    Follows redirects like urllib's default handler, but never forwards the ``Authorization`` header to another host
+    (e.g. a release asset request redirected from api.github.com to the asset CDN), and keeps a HEAD request a HEAD:
+    urllib turns every redirected request into a GET, which for an archive size estimate would start the download.
+    """
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+
+        redirected = super().redirect_request(req, fp, code, msg, headers, newurl)
+
+        if redirected is None:
+            return None
+
+        if redirected.host != req.host:
+            redirected.remove_header("Authorization")
+
+        if req.get_method() == "HEAD":
+            redirected.method = "HEAD"
+
+        return redirected
+
+_opener = request.build_opener(_DropAuthorizationOnRedirect)
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when the run deadline leaves no time for another request attempt.
+    """
+
+def start_run_deadline(seconds: float | None = settings.run_deadline_seconds) -> None:
+    """
+    Starts the per-run deadline. Every request made after this call is bounded by it; ``None`` clears the deadline.
+    """
+
+    global _run_deadline
+
+    _run_deadline = time.monotonic() + seconds if seconds is not None else None
+
+def remaining_time() -> float | None:
+    """
+    Returns the seconds left before the run deadline, or ``None`` if no deadline is set.
+    """
+
+    if _run_deadline is None:
+        return None
+
+    return _run_deadline - time.monotonic()
+
+def _attempt_timeout(timeout: float) -> float:
+
+    remaining = remaining_time()
+
+    if remaining is None:
+        return timeout
+
+    if remaining <= 0:
+        raise DeadlineExceeded("The run deadline was reached before the request could be made.")
+
+    return min(timeout, remaining)
+
+def _backoff(attempt: int) -> None:
+    """
+    Sleeps for an exponentially growing delay with full jitter, without sleeping past the run deadline.
+    """
+
+    ceiling = min(settings.request_backoff_max_seconds, settings.request_backoff_base_seconds * (2 ** attempt))
+    delay   = random.uniform(0, ceiling)
+
+    remaining = remaining_time()
+
+    if remaining is not None and delay >= remaining:
+        raise DeadlineExceeded("The run deadline would be reached while backing off.")
+
+    time.sleep(delay)
+
+def _record_latency(seconds: float) -> None:
+
+    with _latency_lock:
+        _latency_samples.append(seconds)
+
+def hedge_threshold() -> float | None:
+    """
+    Returns the latency percentile after which a hedged request is sent,
+    or ``None`` until enough samples have been collected.
+    """
+
+    with _latency_lock:
+
+        if len(_latency_samples) < settings.hedge_min_samples:
+            return None
+
+        ordered = sorted(_latency_samples)
+
+    index = min(len(ordered) - 1, int(len(ordered) * settings.hedge_percentile))
+
+    return ordered[index]
+
+def _should_retry(req: request.Request, e: Exception, attempt: int, attempts: int) -> bool:
+    """
+    Decides whether a failed attempt is retried and logs the retry. HTTP errors are only retried for
+    ``RETRYABLE_STATUS_CODES``; connection failures and timeouts always are, until attempts run out.
+    """
+
+    if attempt == attempts - 1:
+        return False
+
+    if isinstance(e, error.HTTPError):
+
+        if e.code not in RETRYABLE_STATUS_CODES:
+            return False
+
+        e.close()
+
+        logger.warning("Retrying %s after HTTP %s (attempt %s of %s)", req.full_url, e.code, attempt + 1, attempts)
+
+    else:
+
+        logger.warning("Retrying %s after %s (attempt %s of %s)", req.full_url, e, attempt + 1, attempts)
+
+    request_metrics["retries"] += 1
+
+    return True
+
+def open_url(req: request.Request, timeout: float = settings.request_timeout_seconds, max_attempts: int = settings.request_max_attempts):
+    """
+    Opens a request, retrying connection failures, timeouts and retryable status codes with backoff.
+    Args:
+        req (request.Request): The request to send.
+        timeout (float): Per-attempt socket timeout in seconds, shortened to fit the run deadline.
+        max_attempts (int): Attempts for idempotent methods. Other methods are attempted once.
+    Returns:
+        The open response, to be used as a context manager by the caller (e.g. for streaming a download).
+    Raises:
+        error.HTTPError: For non-retryable status codes, or once attempts run out.
+        error.URLError | TimeoutError: Once attempts run out.
+        DeadlineExceeded: If the run deadline leaves no time for another attempt.
+    """
+
+    attempts = max_attempts if req.get_method() in IDEMPOTENT_METHODS else 1
+
+    for attempt in range(attempts):
+
+        request_metrics["requests"] += 1
+
+        try:
+            return _opener.open(req, timeout=_attempt_timeout(timeout))
+
+        except (error.URLError, TimeoutError, ConnectionError) as e:
+
+            if not _should_retry(req, e, attempt, attempts):
+                raise
+
+        _backoff(attempt)
+
+def _fetch_with_retries(req: request.Request, timeout: float) -> tuple[bytes, dict]:
+    """
+    Sends a request and reads its body, with connecting and reading sharing one budget of
+    ``settings.request_max_attempts`` attempts: a stall while reading the body is retried like a stall while connecting.
+    """
+
+    attempts = settings.request_max_attempts if req.get_method() in IDEMPOTENT_METHODS else 1
+
+    for attempt in range(attempts):
+
+        request_metrics["requests"] += 1
+
+        started = time.monotonic()
+
+        try:
+            with _opener.open(req, timeout=_attempt_timeout(timeout)) as response:
+                body    = response.read()
+                headers = dict(response.headers.items())
+
+        except (error.URLError, TimeoutError, ConnectionError) as e:
+
+            if not _should_retry(req, e, attempt, attempts):
+                raise
+
+            _backoff(attempt)
+
+            continue
+
+        _record_latency(time.monotonic() - started)
+
+        return body, headers
+
+def fetch(req: request.Request, timeout: float = settings.request_timeout_seconds, hedge: bool = False) -> bytes:
+    """
+    Sends a request under the request policy and returns the response body.
+    See ``fetch_with_headers`` for the arguments.
+    """
+
+    body, _ = fetch_with_headers(req, timeout=timeout, hedge=hedge)
+
+    return body
+
+def fetch_with_headers(req: request.Request, timeout: float = settings.request_timeout_seconds, hedge: bool = False) -> tuple[bytes, dict]:
+    """
+    Sends a request under the request policy and returns the response body and headers.
+    Args:
+        req (request.Request): The request to send.
+        timeout (float): Per-attempt socket timeout in seconds.
+        hedge (bool): For metadata calls: if the request is slower than the recent latency percentile
+            (``settings.hedge_percentile``), a second identical request is sent and the first answer wins.
+            Latency samples are kept in memory per process, so hedging only starts once this process has
+            made ``settings.hedge_min_samples`` requests; in practice that is the long-running ``listen`` command,
+            while a single ``update``, ``plan`` or ``prefetch`` run never hedges.
+    Returns:
+        tuple[bytes, dict]: The response body and headers.
+    Raises:
+        The same exceptions as ``open_url``.
+    """
+
+    threshold = hedge_threshold() if hedge and req.get_method() in IDEMPOTENT_METHODS else None
+
+    if threshold is None:
+        return _fetch_with_retries(req, timeout)
+
+    # The executor is only needed once enough latency samples exist to hedge, so it is created on first use
+    from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+
+    global _hedge_executor
+
+    # Metadata calls come from the plan command's worker threads, so only one of them may create the executor
+    with _hedge_lock:
+
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+    primary = _hedge_executor.submit(_fetch_with_retries, req, timeout)
+
+    try:
+        return primary.result(timeout=threshold)
+
+    except FuturesTimeoutError:
+        pass
+
+    request_metrics["hedges"] += 1
+
+    secondary   = _hedge_executor.submit(_fetch_with_retries, req, timeout)
+    first_error = None
+
+    for future in as_completed([primary, secondary], timeout=remaining_time()):
+
+        try:
+            result = future.result()
+
+        except Exception as e:
+
+            first_error = first_error or e
+
+            continue
+
+        if future is secondary:
+            request_metrics["hedge_wins"] += 1
+
+        return result
+
+    raise first_error
+
+def report_request_metrics() -> None:
+    """
+    Logs the request counters collected during the run.
+    """
+
+    global_error_handler("Request Metrics", ", ".join(f"{key}={value}" for key, value in request_metrics.items()), logging_level=logging.INFO)
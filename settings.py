@@ -1 +1,89 @@
-requirements_txt_filename = "requirements.txt"
\ No newline at end of file
+requirements_txt_filename   = "requirements.txt"
+requirements_lock_filename  = "requirements.lock"
+
+# Bytecode precompilation after an update. 0 workers lets compileall use one worker per CPU.
+precompile_workers          = 0
+precompile_site_packages    = False
+
+# Subprocess execution. Commands beyond the concurrency limit wait for a free slot.
+max_concurrent_commands     = 2
+command_timeout_seconds     = 900
+
+# HTTP request policy. Timeouts are per attempt; the run deadline bounds every request made during one run.
+request_timeout_seconds         = 30
+run_deadline_seconds            = 1800
+request_max_attempts            = 4
+request_backoff_base_seconds    = 0.5
+request_backoff_max_seconds     = 10
+
+# Hedged metadata requests: a second request is sent once the first is slower than this percentile of recent latencies.
+# Samples are collected in memory per process, so only the long-running 'listen' command gathers enough of them to hedge.
+hedge_percentile                = 0.95
+hedge_min_samples               = 20
+
+# Update state and the managed repository set, both stored in the base directory.
+state_database_filename     = "updater_state.db"
+repository_manifest_filename = "repositories.json"
+legacy_release_filename     = "current_release.txt"
+
+# Per-package lock files, one per package directory, held while an updater process writes into the package.
+lock_directory_name         = ".locks"
+
+# Seconds a state write waits for another updater process (listener, prefetch/apply) to finish its short transaction.
+state_database_timeout_seconds = 30
+
+# Used when the base directory has no repository manifest. Maps package directory -> GitHub repository.
+default_repo_mapping = {
+
+    "mql5-script-manager"       : "github-push-script",
+    "vm-status-monitor"         : "azure-vm-monitor",
+
+}
+
+# Release webhook listener. Events arriving within the coalescing window are applied in one update pass.
+webhook_host                = "127.0.0.1"
+webhook_port                = 8787
+webhook_coalesce_seconds    = 5
+webhook_max_body_bytes      = 1024 * 1024
+
+# Prefetched releases are staged under the base directory and applied during the maintenance window (local time, HH:MM).
+# A window whose end is earlier than its start crosses midnight.
+staging_directory_name      = ".staging"
+maintenance_window_start    = "22:00"
+maintenance_window_end      = "23:30"
+
+# Read-only plan command. Cached release metadata younger than the TTL is used without contacting GitHub.
+release_cache_filename      = "release_cache.json"
+release_cache_ttl_seconds   = 120
+plan_time_budget_seconds    = 10
+plan_max_workers            = 16
+
+# Incremental extraction only rewrites files whose size or CRC32 differ from the release, and removes files dropped from it.
+incremental_extraction      = True
+extract_index_filename      = ".extract_index.json"
+
+# Release assets holding sha256 checksums of the release archive, in sha256sum format. "<archive name>.sha256" also qualifies;
+# only a digest listed under the archive's name is used.
+checksum_asset_names        = ("SHA256SUMS", "SHA256SUMS.txt", "sha256sums.txt", "checksums.txt")
+download_chunk_size         = 1024 * 1024
+
+# Start-up budget for importing the entry point on a warm bytecode cache, enforced by benchmarks/bench_startup.py,
+# as a multiple of the time the same interpreter takes to import urllib.request (which every run needs anyway).
+startup_import_budget_ratio = 2.5
+
+# Content-addressed file store. When enabled, every release file is stored once under <base>/.objects by sha256 and
+# package trees are built from hardlinks to it, keeping the last few versions of each package for rollback.
+# Package files then share their inode with the store, so it suits packages that never edit their own files in place.
+use_content_store           = False
+content_store_directory_name = ".objects"
+versions_directory_name     = ".versions"
+content_store_keep_versions = 3
+
+# Download scheduling. Pending updates are downloaded shortest-first (after manifest priorities, higher first),
+# sharing one token bucket. None leaves downloads unthrottled.
+max_concurrent_downloads    = 2
+download_bandwidth_limit_bytes_per_second = None
+download_bandwidth_burst_bytes = 256 * 1024
+
+# Size estimates used for scheduling are a single HEAD request per pending update, all sent at once.
+size_estimate_timeout_seconds = 5
@@ -0,0 +1,185 @@
+import os
+import json
+import shutil
+import time
+from datetime import datetime
+from extract_index import file_crc32, index_entry, load_extract_index, matches_member, remove_stale_files, save_extract_index
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+# Layout of one staged release: <base>/.staging/<package>/<tag>/{tree/, release.json}
+# release.json holds the tag, commit SHA, the size and CRC32 of every file in the tree, and the tag installed at staging time
+STAGED_TREE_DIRECTORY   = "tree"
+STAGED_METADATA_FILE    = "release.json"
+PARTIAL_SUFFIX          = ".partial"
+
+def package_staging_directory(root_directory: str, package: str) -> str:
+
+    return os.path.join(root_directory, settings.staging_directory_name, package)
+
+def partial_staging_directory(root_directory: str, package: str, tag: str) -> str:
+    """
+    Returns the directory a release is extracted into before it is verified and committed as staged.
+    Any leftover from an interrupted run is removed first.
+    """
+
+    partial_directory = os.path.join(package_staging_directory(root_directory, package), tag + PARTIAL_SUFFIX)
+
+    if os.path.exists(partial_directory):
+        shutil.rmtree(partial_directory)
+
+    os.makedirs(os.path.join(partial_directory, STAGED_TREE_DIRECTORY))
+
+    return partial_directory
+
+def staged_release(root_directory: str, package: str) -> dict | None:
+    """
+    Returns the metadata of the release staged for a package (``tag``, ``commit_sha``, ``staged_at``, ``files``, ``installed_tag``, ``tree``),
+    or ``None`` if nothing is staged. ``files`` maps each relative path to its ``size`` and ``crc``.
+    """
+
+    package_directory = package_staging_directory(root_directory, package)
+
+    if not os.path.isdir(package_directory):
+        return None
+
+    for entry in os.listdir(package_directory):
+
+        metadata_path = os.path.join(package_directory, entry, STAGED_METADATA_FILE)
+
+        if entry.endswith(PARTIAL_SUFFIX) or not os.path.exists(metadata_path):
+            continue
+
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+
+        metadata["tree"] = os.path.join(package_directory, entry, STAGED_TREE_DIRECTORY)
+
+        return metadata
+
+    return None
+
+def verify_staged_tree(tree_directory: str, expected_files: dict[str, dict]) -> None:
+    """
+    Checks that every expected file was extracted with the size and CRC32 recorded in the archive.
+    Args:
+        tree_directory (str): The extracted tree.
+        expected_files (dict[str, dict]): ``size`` and ``crc`` of every file, keyed by relative path.
+    Raises:
+        ValueError: If a file is missing or its size or CRC32 differ.
+    """
+
+    for relative_path, expected in expected_files.items():
+
+        file_path = os.path.join(tree_directory, relative_path)
+
+        if not os.path.isfile(file_path):
+            raise ValueError(f"Staged file {relative_path} is missing.")
+
+        if os.path.getsize(file_path) != expected["size"]:
+            raise ValueError(f"Staged file {relative_path} is {os.path.getsize(file_path)} bytes, expected {expected['size']}.")
+
+        if file_crc32(file_path) != expected["crc"]:
+            raise ValueError(f"Staged file {relative_path} does not match the CRC32 recorded in the archive.")
+
+def commit_staged_release(partial_directory: str, tag: str, commit_sha: str | None, files: dict[str, dict], installed_tag: str | None) -> str:
+    """
+    Marks a verified partial extraction as the package's staged release, replacing any release staged earlier.
+    installed_tag is the version installed when the release was staged; applying is refused once it has changed.
+    Returns the staged release directory.
+    """
+
+    package_directory = os.path.dirname(partial_directory)
+    staged_directory  = os.path.join(package_directory, tag)
+
+    with open(os.path.join(partial_directory, STAGED_METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump({"tag": tag, "commit_sha": commit_sha, "staged_at": time.time(), "files": files, "installed_tag": installed_tag}, f)
+
+    for entry in os.listdir(package_directory):
+
+        if entry != os.path.basename(partial_directory):
+            shutil.rmtree(os.path.join(package_directory, entry))
+
+    os.replace(partial_directory, staged_directory)
+
+    return staged_directory
+
+def _staged_tree_files(tree_directory: str) -> dict[str, dict]:
+
+    # Releases staged before the file list was recorded in release.json
+    files = {}
+
+    for current_directory, _, file_names in os.walk(tree_directory):
+
+        for file_name in file_names:
+
+            file_path = os.path.join(current_directory, file_name)
+
+            files[os.path.relpath(file_path, tree_directory).replace(os.sep, "/")] = {"size": os.path.getsize(file_path), "crc": file_crc32(file_path)}
+
+    return files
+
+def apply_staged_tree(tree_directory: str, target_directory: str, files: dict[str, dict] | None = None) -> dict[str, int]:
+    """
+    Applies a staged tree to the package directory the way incremental extraction would: only files whose
+    size or CRC32 differ are moved in, files the previous install wrote that the release dropped are removed,
+    and the package's extract index is saved. Unchanged files keep their mtime, so their ``__pycache__`` stays valid.
+    The staging area lives in the same base directory, so each move is a rename rather than a copy.
+    Args:
+        tree_directory (str): The staged tree.
+        target_directory (str): The package directory.
+        files (dict[str, dict] | None): ``size`` and ``crc`` of every staged file, as recorded in ``release.json``.
+    Returns:
+        dict[str, int]: The number of files ``moved``, ``skipped`` (unchanged) and ``removed``.
+    """
+
+    files          = files or _staged_tree_files(tree_directory)
+    previous_index = load_extract_index(target_directory)
+    current_index  = {}
+    counters       = {"moved": 0, "skipped": 0, "removed": 0}
+
+    for relative_path, expected in files.items():
+
+        target_path = os.path.join(target_directory, relative_path)
+
+        unchanged, cached_entry = matches_member(target_path, expected["size"], expected["crc"], previous_index.get(relative_path))
+
+        if unchanged:
+
+            current_index[relative_path] = cached_entry
+            counters["skipped"]         += 1
+
+            continue
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+        os.replace(os.path.join(tree_directory, relative_path), target_path)
+
+        current_index[relative_path] = index_entry(target_path, expected["crc"])
+        counters["moved"]           += 1
+
+    counters["removed"] = remove_stale_files(target_directory, previous_index, set(files))
+
+    save_extract_index(target_directory, current_index)
+
+    return counters
+
+def discard_staged_release(root_directory: str, package: str) -> None:
+
+    shutil.rmtree(package_staging_directory(root_directory, package), ignore_errors=True)
+
+def in_maintenance_window(now: datetime | None = None) -> bool:
+    """
+    Returns whether the local time is inside the configured maintenance window.
+    """
+
+    now   = now or datetime.now()
+    start = datetime.strptime(settings.maintenance_window_start, "%H:%M").time()
+    end   = datetime.strptime(settings.maintenance_window_end, "%H:%M").time()
+
+    if start <= end:
+        return start <= now.time() < end
+
+    return now.time() >= start or now.time() < end
@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import threading
+import time
+from error_handler import global_error_handler
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    package         TEXT PRIMARY KEY,
+    repo_name       TEXT NOT NULL,
+    installed_tag   TEXT,
+    installed_sha   TEXT,
+    checked_at      REAL,
+    installed_at    REAL,
+    last_duration   REAL,
+    failure_count   INTEGER NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    download_size   INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_packages_repo_name ON packages (repo_name);
+
+CREATE TABLE IF NOT EXISTS verified_archives (
+    repo_name       TEXT NOT NULL,
+    tag             TEXT NOT NULL,
+    sha256          TEXT NOT NULL,
+    size            INTEGER NOT NULL,
+    verified_at     REAL NOT NULL,
+    PRIMARY KEY (repo_name, tag)
+);
+"""
+
+# Columns added after the first release of the schema, created on databases that predate them
+ADDED_COLUMNS = {
+
+    "packages": {"download_size": "INTEGER"},
+
+}
+
+class StateStore:
+    """
+    SQLite-backed update state for every managed package, stored in the base directory.
+
+    Every state change is committed in its own short transaction as soon as it is made, so an ``update`` run,
+    the webhook listener and ``prefetch``/``apply`` only contend for the write lock for milliseconds, and a killed
+    run keeps every install it already recorded. Methods may be called from the concurrent download workers;
+    a lock serialises them on the shared connection.
+    """
+
+    def __init__(self, database_path: str, read_only: bool = False):
+
+        self.database_path = database_path
+        self.read_only     = read_only
+
+        if read_only:
+
+            # mode=ro fails instead of creating the database, and rejects any write made through this store
+            self.connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True, timeout=settings.state_database_timeout_seconds, check_same_thread=False)
+
+        else:
+
+            self.connection = sqlite3.connect(database_path, timeout=settings.state_database_timeout_seconds, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+
+            self._add_missing_columns()
+
+        self.connection.row_factory = sqlite3.Row
+        self.lock                   = threading.RLock()
+
+    def _add_missing_columns(self) -> None:
+
+        for table, columns in ADDED_COLUMNS.items():
+
+            existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+
+            for column, column_type in columns.items():
+
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+
+        if exc_type is None:
+            self.connection.commit()
+        else:
+            self.connection.rollback()
+
+        self.connection.close()
+
+    def commit(self) -> None:
+        self.connection.commit()
+
+    def close(self) -> None:
+
+        self.connection.commit()
+        self.connection.close()
+
+    def get_package(self, package: str) -> sqlite3.Row | None:
+
+        with self.lock:
+
+            return self.connection.execute("SELECT * FROM packages WHERE package = ?", (package,)).fetchone()
+
+    def get_installed_tag(self, package: str) -> str | None:
+
+        row = self.get_package(package)
+
+        return row["installed_tag"] if row else None
+
+    def installed_versions(self) -> list[sqlite3.Row]:
+        """
+        Returns the state row of every package, answering "what version is everything on" in one query.
+        """
+
+        with self.lock:
+
+            return self.connection.execute("SELECT * FROM packages ORDER BY package").fetchall()
+
+    def _ensure_package(self, package: str, repo_name: str) -> None:
+
+        with self.lock:
+
+            self.connection.execute(
+                "INSERT INTO packages (package, repo_name) VALUES (?, ?) ON CONFLICT (package) DO UPDATE SET repo_name = excluded.repo_name",
+                (package, repo_name)
+            )
+
+    def record_check(self, package: str, repo_name: str) -> None:
+
+        with self.lock, self.connection:
+
+            self._ensure_package(package, repo_name)
+
+            self.connection.execute("UPDATE packages SET checked_at = ? WHERE package = ?", (time.time(), package))
+
+    def record_install(self, package: str, repo_name: str, tag: str, sha: str | None, duration: float) -> None:
+
+        with self.lock, self.connection:
+
+            self._ensure_package(package, repo_name)
+
+            self.connection.execute(
+                """
+                UPDATE packages
+                SET installed_tag = ?, installed_sha = ?, installed_at = ?, last_duration = ?, failure_count = 0, last_error = NULL
+                WHERE package = ?
+                """,
+                (tag, sha, time.time(), duration, package)
+            )
+
+    def record_failure(self, package: str, repo_name: str, message: str) -> None:
+
+        with self.lock, self.connection:
+
+            self._ensure_package(package, repo_name)
+
+            self.connection.execute(
+                "UPDATE packages SET failure_count = failure_count + 1, last_error = ? WHERE package = ?",
+                (message, package)
+            )
+
+    def get_verified_archive(self, repo_name: str, tag: str) -> sqlite3.Row | None:
+        """
+        Returns the digest and size recorded when the archive of a release was last verified.
+        """
+
+        with self.lock:
+
+            return self.connection.execute("SELECT * FROM verified_archives WHERE repo_name = ? AND tag = ?", (repo_name, tag)).fetchone()
+
+    def record_verified_archive(self, repo_name: str, tag: str, sha256: str, size: int) -> None:
+
+        with self.lock, self.connection:
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO verified_archives (repo_name, tag, sha256, size, verified_at) VALUES (?, ?, ?, ?, ?)",
+                (repo_name, tag, sha256, size, time.time())
+            )
+
+    def record_download_size(self, package: str, repo_name: str, size: int) -> None:
+        """
+        Records the size of a release download, used to estimate the package's next download when scheduling.
+        """
+
+        with self.lock, self.connection:
+
+            self._ensure_package(package, repo_name)
+
+            self.connection.execute("UPDATE packages SET download_size = ? WHERE package = ?", (size, package))
+
+    def get_download_size(self, package: str) -> int | None:
+
+        row = self.get_package(package)
+
+        # A read-only store may open a database that predates the column
+        return row["download_size"] if row and "download_size" in row.keys() else None
+
+    def import_legacy_release_file(self, package: str, repo_name: str, package_directory: str) -> None:
+        """
+        Seeds the installed tag from a package's ``current_release.txt`` the first time the package is seen,
+        so hosts upgrading from file-based state don't reinstall everything.
+        """
+
+        if self.get_installed_tag(package) is not None:
+            return
+
+        release_file = os.path.join(package_directory, settings.legacy_release_filename)
+
+        if not os.path.exists(release_file):
+            return
+
+        with open(release_file, "r") as f:
+            stored_release = f.read().strip()
+
+        if not stored_release:
+            return
+
+        with self.lock, self.connection:
+
+            self._ensure_package(package, repo_name)
+
+            self.connection.execute("UPDATE packages SET installed_tag = ? WHERE package = ?", (stored_release, package))
+
+        global_error_handler("State Migration", f"Imported {stored_release} for {package} from {release_file}.", logging_level=logging.INFO)
+
+def open_state_store(root_directory: str, read_only: bool = False) -> StateStore | None:
+    """
+    Opens (creating if needed) the state database in the base directory.
+    With read_only set, the database is never created or written, and ``None`` is returned if it does not exist yet.
+    """
+
+    database_path = os.path.join(root_directory, settings.state_database_filename)
+
+    if read_only and not os.path.exists(database_path):
+        return None
+
+    return StateStore(database_path, read_only=read_only)
@@ -0,0 +1,148 @@
+"""
+Posts signed release webhooks to a listener on localhost and checks which packages get queued.
+
+Usage:
+    python -m pytest tests/test_webhook_listener.py
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from urllib import request, error
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, REPO_ROOT)
+
+from webhook_listener import UpdateQueue, make_handler
+
+SECRET = b"test-secret"
+
+REPO_MAPPING = {
+
+    "mql5-script-manager"   : "github-push-script",
+    "vm-status-monitor"     : "azure-vm-monitor",
+
+}
+
+def sign(body: bytes, secret: bytes = SECRET) -> str:
+
+    return "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+class ReleaseWebhookTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+
+        # global_error_handler writes log.log into the working directory; keep it out of the repository
+        cls.original_directory = os.getcwd()
+        cls.log_directory      = tempfile.TemporaryDirectory(prefix="webhook_test_")
+
+        os.chdir(cls.log_directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+
+        os.chdir(cls.original_directory)
+
+        cls.log_directory.cleanup()
+
+    def setUp(self):
+
+        self.passes      = []
+        self.pass_done   = threading.Event()
+        self.queue       = UpdateQueue(self._record_pass, coalesce_seconds=0.3)
+        self.server      = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(SECRET, REPO_MAPPING, self.queue))
+
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _record_pass(self, packages: set[str]) -> None:
+
+        self.passes.append(packages)
+        self.pass_done.set()
+
+    def post(self, payload, event: str = "release", signature: str | None = None) -> int:
+
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+
+        req = request.Request(
+            f"http://127.0.0.1:{self.server.server_port}/",
+            data=body,
+            method="POST",
+            headers={
+                "Content-Type"          : "application/json",
+                "X-GitHub-Event"        : event,
+                "X-Hub-Signature-256"   : signature or sign(body),
+            }
+        )
+
+        try:
+            with request.urlopen(req, timeout=5) as response:
+                return response.status
+
+        except error.HTTPError as e:
+            return e.code
+
+    def release(self, repo_name: str, action: str = "published") -> dict:
+
+        return {"action": action, "repository": {"name": repo_name}, "release": {"tag_name": "v1.0.0"}}
+
+    def test_valid_signature_queues_the_package(self):
+
+        self.assertEqual(self.post(self.release("azure-vm-monitor")), 202)
+
+        self.assertTrue(self.pass_done.wait(5))
+        self.assertEqual(self.passes, [{"vm-status-monitor"}])
+
+    def test_bad_signature_is_rejected(self):
+
+        status = self.post(self.release("azure-vm-monitor"), signature=sign(b"something else"))
+
+        self.assertEqual(status, 401)
+        self.assertFalse(self.pass_done.wait(0.6))
+
+    def test_burst_is_coalesced_into_one_pass(self):
+
+        for repo_name in ("azure-vm-monitor", "github-push-script", "azure-vm-monitor"):
+            self.assertEqual(self.post(self.release(repo_name)), 202)
+
+        self.assertTrue(self.pass_done.wait(5))
+        self.assertEqual(self.passes, [{"vm-status-monitor", "mql5-script-manager"}])
+
+    def test_unmapped_repository_is_ignored(self):
+
+        self.assertEqual(self.post(self.release("some-other-repo")), 202)
+
+        self.assertFalse(self.pass_done.wait(0.6))
+
+    def test_signed_non_object_payload_is_rejected(self):
+
+        self.assertEqual(self.post(b"[1]"), 400)
+
+        self.assertFalse(self.pass_done.wait(0.6))
+
+    def test_non_numeric_content_length_is_rejected(self):
+
+        with socket.create_connection(("127.0.0.1", self.server.server_port), timeout=5) as connection:
+
+            connection.sendall(b"POST / HTTP/1.1\r\nHost: localhost\r\nContent-Length: abc\r\nX-GitHub-Event: release\r\n\r\n")
+
+            status_line = connection.makefile("rb").readline()
+
+        self.assertEqual(status_line.split()[1], b"400")
+        self.assertFalse(self.pass_done.wait(0.6))
+
+if __name__ == "__main__":
+    unittest.main()
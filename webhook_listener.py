@@ -0,0 +1,200 @@
+import hmac
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from error_handler import global_error_handler
+import logging
+import settings
+
+logger = logging.getLogger(__name__)
+
+# Release actions that mean a new version is available to install
+RELEASE_ACTIONS = {"published", "released"}
+
+def verify_signature(secret: bytes, body: bytes, signature_header: str | None) -> bool:
+    """
+    Verifies GitHub's ``X-Hub-Signature-256`` header (``sha256=<hex hmac of the body>``) in constant time.
+    """
+
+    if not signature_header or not signature_header.startswith("sha256="):
+        return False
+
+    expected = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+    return hmac.compare_digest(expected, signature_header)
+
+class UpdateQueue:
+    """
+    Coalesces release events into update passes.
+
+    Packages queued while a pass is pending or running are merged into a set, so a burst of events for the
+    same repository results in one update. A single worker thread runs the passes one at a time.
+    """
+
+    def __init__(self, update_callback, coalesce_seconds: float = settings.webhook_coalesce_seconds):
+
+        self.update_callback  = update_callback
+        self.coalesce_seconds = coalesce_seconds
+        self.pending          = set()
+        self.condition        = threading.Condition()
+        self.worker           = threading.Thread(target=self._run, name="update-queue", daemon=True)
+
+        self.worker.start()
+
+    def enqueue(self, package: str) -> None:
+
+        with self.condition:
+
+            self.pending.add(package)
+            self.condition.notify()
+
+    def _run(self) -> None:
+
+        while True:
+
+            with self.condition:
+
+                while not self.pending:
+                    self.condition.wait()
+
+            # Let the rest of a burst arrive before draining the queue
+            time.sleep(self.coalesce_seconds)
+
+            with self.condition:
+
+                packages = set(self.pending)
+                self.pending.clear()
+
+            try:
+                self.update_callback(packages)
+
+            except Exception as e:
+
+                global_error_handler("Webhook Update Error", f"Update triggered by a release event failed for {', '.join(sorted(packages))}: {e}", logging_level=logging.ERROR)
+
+def make_handler(secret: bytes, repo_mapping: dict[str, str], update_queue: UpdateQueue):
+    """
+    Builds the request handler class bound to the webhook secret, the repository mapping and the update queue.
+    """
+
+    packages_by_repo = {}
+
+    for package, repo_name in repo_mapping.items():
+        packages_by_repo.setdefault(repo_name, []).append(package)
+
+    class ReleaseWebhookHandler(BaseHTTPRequestHandler):
+
+        def _respond(self, status: int, message: str) -> None:
+
+            body = message.encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+
+            try:
+                content_length = int(self.headers.get("Content-Length") or 0)
+
+            except ValueError:
+
+                self._respond(400, "Invalid Content-Length.")
+
+                return
+
+            if content_length <= 0 or content_length > settings.webhook_max_body_bytes:
+
+                self._respond(413 if content_length > 0 else 400, "Invalid payload size.")
+
+                return
+
+            body = self.rfile.read(content_length)
+
+            if not verify_signature(secret, body, self.headers.get("X-Hub-Signature-256")):
+
+                global_error_handler("Webhook Rejected", f"Invalid signature on a webhook from {self.client_address[0]}.", logging_level=logging.WARNING)
+
+                self._respond(401, "Invalid signature.")
+
+                return
+
+            event = self.headers.get("X-GitHub-Event")
+
+            if event == "ping":
+
+                self._respond(200, "pong")
+
+                return
+
+            if event != "release":
+
+                self._respond(202, f"Ignored '{event}' event.")
+
+                return
+
+            try:
+                payload = json.loads(body)
+
+                # A validly signed body can still be any JSON value, not just an object
+                if not isinstance(payload, dict):
+                    raise TypeError("The release payload is not a JSON object.")
+
+                action    = payload.get("action")
+                repo_name = payload["repository"]["name"]
+
+            except (ValueError, KeyError, TypeError):
+
+                self._respond(400, "Malformed release payload.")
+
+                return
+
+            packages = packages_by_repo.get(repo_name, [])
+
+            if action not in RELEASE_ACTIONS or not packages:
+
+                self._respond(202, f"Ignored '{action}' release for {repo_name}.")
+
+                return
+
+            for package in packages:
+                update_queue.enqueue(package)
+
+            global_error_handler("Webhook Received", f"Queued an update of {', '.join(packages)} for the {repo_name} release.", logging_level=logging.INFO)
+
+            self._respond(202, f"Queued {', '.join(packages)}.")
+
+        def log_message(self, format, *args):
+
+            logger.debug("%s - %s", self.client_address[0], format % args)
+
+    return ReleaseWebhookHandler
+
+def serve_release_webhooks(host: str, port: int, secret: bytes, repo_mapping: dict[str, str], update_callback) -> None:
+    """
+    Serves GitHub ``release`` webhooks until interrupted.
+    Args:
+        host (str): Address to bind to.
+        port (int): Port to bind to.
+        secret (bytes): The webhook secret configured on GitHub, used to verify ``X-Hub-Signature-256``.
+        repo_mapping (dict[str, str]): Package directory name -> GitHub repository name.
+        update_callback: Called from the queue's worker thread with the set of packages to update.
+    """
+
+    update_queue = UpdateQueue(update_callback)
+    server       = ThreadingHTTPServer((host, port), make_handler(secret, repo_mapping, update_queue))
+
+    global_error_handler("Webhook Listener", f"Listening for release webhooks on {host}:{port}.", logging_level=logging.INFO)
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        server.server_close()